@@ -1,7 +1,8 @@
 import pathlib
 import sys
 
-sys.path.append('../src/')
+# Pfad unabhängig vom Arbeitsverzeichnis auflösen, aus dem Sphinx läuft
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent.parent / 'src'))
 
 # Configuration file for the Sphinx documentation builder.
 #
@@ -56,3 +57,7 @@ latex_elements = {
 autodoc_type_aliases = {
     'SqlValue': 'SqlValue'
 }
+
+# schwergewichtige Abhängigkeiten beim Doc-Build nur mocken statt
+# wirklich zu importieren
+autodoc_mock_imports = ['pandas', 'pyodbc', 'lxml', 'openpyxl', 'yaml', 'PySimpleGUI']
@@ -6,6 +6,7 @@
 # license that can be found in the LICENSE file or at
 # https://opensource.org/licenses/MIT.
 
+import concurrent.futures
 import pathlib
 import PyAPplus64
 import applus_configs
@@ -22,15 +23,30 @@ def main(confFile: pathlib.Path, updateDB: bool, docDir: Optional[str] = None) -
     sql.addFields("ID", "ARTIKEL", "DOCUMENTS")
     sql.where.addConditionFieldStringNotEmpty("DOCUMENTS")
 
-    for row in server.dbQueryAll(sql):
-        doc = pathlib.Path(docDir + row.DOCUMENTS)
-        if not doc.exists():
-            print("Bild '{}' für Artikel '{}' nicht gefunden".format(doc, row.ARTIKEL))
-
-            if updateDB:
-                upd = server.mkUseXMLRowUpdate("ARTIKEL", row.ID)
-                upd.addField("DOCUMENTS", None)
-                upd.update()
+    rows = server.dbQueryIter(sql)
+
+    # Die exists()-Checks laufen parallel in einem Thread-Pool. Auf einem
+    # Netzlaufwerk (DocLib liegt üblicherweise auf einem SMB-Share) dominiert
+    # die Latenz der einzelnen stat-Aufrufe, nicht die CPU.
+    def checkRow(row):  # type: ignore
+        return (row, pathlib.Path(docDir + row.DOCUMENTS).exists())
+
+    missingIds = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=32) as executor:
+        for (row, exists) in executor.map(checkRow, rows):
+            if not exists:
+                print("Bild '{}' für Artikel '{}' nicht gefunden".format(docDir + row.DOCUMENTS, row.ARTIKEL))
+                missingIds.append(row.ID)
+
+    # alle fehlenden Dokumente in einem (bzw. wenigen) Statements löschen,
+    # statt einem Update pro Artikel
+    if updateDB:
+        chunkSize = 1000
+        for i in range(0, len(missingIds), chunkSize):
+            batch = missingIds[i:i + chunkSize]
+            server.dbExecute(
+                "UPDATE ARTIKEL SET DOCUMENTS=NULL WHERE ID IN ({})".format(",".join("?" * len(batch))),
+                *batch)
 
 
 if __name__ == "__main__":
@@ -26,18 +26,35 @@ import logging
 import yaml
 from typing import Optional
 
+# libyaml-basierte Loader/Dumper sind deutlich schneller als die reinen
+# Python-Varianten, stehen aber nicht in jeder Umgebung zur Verfügung.
+try:
+    from yaml import CDumper as YamlDumper
+    from yaml import CUnsafeLoader as YamlLoader
+except ImportError:
+    from yaml import Dumper as YamlDumper  # type: ignore[assignment]
+    from yaml import UnsafeLoader as YamlLoader  # type: ignore[assignment]
 
-def main(confFile: pathlib.Path, artikel: str, artikelNeu: Optional[str] = None) -> None:
+
+def main(confFile: pathlib.Path, artikel: str, artikelNeu: Optional[str] = None,
+         printYaml: bool = False) -> None:
     # Server verbinden
     server = PyAPplus64.applus.applusFromConfigFile(confFile)
 
     # DuplicateBusinessObject für Artikel erstellen
     dArt = PyAPplus64.duplicate.loadDBDuplicateArtikel(server, artikel)
 
-    # DuplicateBusinessObject zur Demonstration in YAML konvertieren und zurück
-    dArtYaml = yaml.dump(dArt)
-    print(dArtYaml)
-    dArt2 = yaml.load(dArtYaml, Loader=yaml.UnsafeLoader)
+    # DuplicateBusinessObject zur Demonstration serialisieren und zurück;
+    # das binäre Format ist um ein Vielfaches schneller als YAML, YAML
+    # lohnt sich nur, wenn ein Mensch die Ausgabe lesen soll
+    if not (dArt is None):
+        if printYaml:
+            dArtYaml = yaml.dump(dArt, Dumper=YamlDumper)
+            print(dArtYaml)
+            dArt2 = yaml.load(dArtYaml, Loader=YamlLoader)
+        else:
+            buf = dArt.dumpsBinary()
+            dArt2 = PyAPplus64.duplicate.DuplicateBusinessObject.loadsBinary(buf)
 
     # Neue Artikel-Nummer bestimmen und DuplicateBusinessObject in DB schreiben
     # Man könnte hier genauso gut einen anderen Server verwenden
@@ -7,6 +7,7 @@
 # https://opensource.org/licenses/MIT.
 
 import PySimpleGUI as sg  # type: ignore
+import concurrent.futures
 import pathlib
 import PyAPplus64
 from PyAPplus64 import applus
@@ -17,21 +18,25 @@ import pathlib
 import sys
 
 def importViewsUDFs(server, views, udfs, dbanpass):
-  res = ""
-  try:    
+  parts = []
+  try:
     if views or udfs:
-      for env in server.scripttool.getAllEnvironments():
-        res = res + server.importUdfsAndViews(env, views, udfs);
-        res = res + "\n\n";
+      # Umgebungen nur einmal abfragen; die Imports in die einzelnen
+      # Umgebungen sind unabhängig und laufen parallel
+      envs = list(server.scripttool.getAllEnvironments())
+      with concurrent.futures.ThreadPoolExecutor(max_workers=max(len(envs), 1)) as executor:
+        for envRes in executor.map(lambda env: server.importUdfsAndViews(env, views, udfs), envs):
+          parts.append(envRes);
+          parts.append("\n\n");
 
     for xml in dbanpass:
-      res = res + "Verarbeite " + xml + "\n"
+      parts.append("Verarbeite " + xml + "\n")
       xmlRes = server.updateDatabase(xml);
       if (xmlRes == ""): xmlRes = "OK";
-      res = res + xmlRes
-      res = res + "\n\n"
+      parts.append(xmlRes)
+      parts.append("\n\n")
 
-    sg.popup_scrolled("Importiere", res)
+    sg.popup_scrolled("Importiere", "".join(parts))
   except:
     sg.popup_error("Fehler", traceback.format_exc())
 
@@ -44,22 +49,28 @@ def importIntoSystem(server, system):
     views = []
     udfs = []
     dbanpass = []
-    errors = ""
+    errorParts = []
 
+    # der Installationspfad ändert sich nicht, daher nur einmal vom
+    # AppServer erfragen statt mehrfach pro Argument
+    installPath = server.scripttool.getInstallPathAppServer()
+    viewDir = installPath.joinpath("Database", "View")
+    udfDir = installPath.joinpath("Database", "UDF")
+    dbanpassDir = installPath.joinpath("DBChange")
 
     for i in range (1, len(sys.argv)):
       arg = pathlib.Path(sys.argv[i])
-      if arg == server.scripttool.getInstallPathAppServer().joinpath("Database", "View", arg.stem + ".sql"):
+      if arg == viewDir.joinpath(arg.stem + ".sql"):
         views.append(arg.stem)
-      elif arg == server.scripttool.getInstallPathAppServer().joinpath("Database", "UDF", arg.stem + ".sql"):
+      elif arg == udfDir.joinpath(arg.stem + ".sql"):
         udfs.append(arg.stem)
-      elif arg == server.scripttool.getInstallPathAppServer().joinpath("DBChange", arg.stem + ".xml"):
+      elif arg == dbanpassDir.joinpath(arg.stem + ".xml"):
         dbanpass.append(arg.stem + ".xml")
       else:
-        errors = errors + "  - " + str(arg) + "\n";
+        errorParts.append("  - " + str(arg) + "\n");
 
-    if len(errors) > 0:
-      msg = "Folgende Dateien sind keine View, UDF oder DB-Anpass-Dateien des "+system+"-Systems:\n" + errors;
+    if errorParts:
+      msg = "Folgende Dateien sind keine View, UDF oder DB-Anpass-Dateien des "+system+"-Systems:\n" + "".join(errorParts);
       sg.popup_error("Fehler", msg);
     if views or udfs or dbanpass:
       importViewsUDFs(server, views, udfs, dbanpass)
@@ -8,13 +8,29 @@
 
 # Erzeugt Excel-Tabellen mit Werkstattaufträgen und Werkstattauftragspositionen mit Mengenabweichungen
 
+import concurrent.futures
 import datetime
+from dateutil.relativedelta import relativedelta
 import PyAPplus64
 import applus_configs
 import pandas as pd  # type: ignore
 import pathlib
+import urllib.parse
 from typing import Tuple, Union, Optional
 
+# feste Bedingungen einmal beim Laden des Moduls bauen statt bei jedem
+# Aufruf der Loader neu
+_condStatusGe5 = PyAPplus64.sql_utils.SqlConditionFieldGe("w.STATUS", 5)
+_condStatusEq4 = PyAPplus64.sql_utils.SqlConditionFieldEq("w.STATUS", 4)
+_condAbsDiff = PyAPplus64.sql_utils.SqlConditionPrepared("(abs(w.MENGE-w.MENGE_IST) > 0.001)")
+
+
+def _quoteSeries(s: pd.Series) -> pd.Series:
+    """percent-kodiert eine Spalte von Query-Parameter-Werten, wie es
+       makeWebLink pro Wert täte; Werte mit '&', '#' oder Leerzeichen
+       würden sonst kaputte Hyperlinks ergeben"""
+    return s.astype(str).map(urllib.parse.quote)
+
 
 def ladeAlleWerkstattauftragMengenabweichungen(
         server: PyAPplus64.APplusServer,
@@ -28,39 +44,39 @@ def ladeAlleWerkstattauftragMengenabweichungen(
                        "APLAN as ARTIKEL", "NAME as ARTIKELNAME")
     sql.addFields("w.UPDDATE", "p.NAME as UPDNAME")
 
-    sql.where.addConditionFieldGe("w.STATUS", 5)
-    sql.where.addCondition("abs(w.MENGE-w.MENGE_IST) > 0.001")
-    sql.where.addCondition(cond)
+    sql.where.addCondition(_condStatusGe5)
+    sql.where.addCondition(_condAbsDiff)
+    if not (cond is None):
+        sql.where.addCondition(cond)
     sql.order = "w.UPDDATE"
-    dfOrg = PyAPplus64.pandas.pandasReadSql(server, sql)
-
-    # Add Links
-    df = dfOrg.copy()
-    df = df.drop(columns=["ID"])
-    # df = df[['POSITION', 'BAUFTRAG', 'MENGE']] # reorder / filter columns
-
-    df['POSITION'] = PyAPplus64.pandas.mkHyperlinkDataframeColumn(
-                        dfOrg,
-                        lambda r: r.POSITION,
-                        lambda r: server.makeWebLinkWauftrag(
-                            bauftrag=r.BAUFTRAG, accessid=r.ID))
-    df['BAUFTRAG'] = PyAPplus64.pandas.mkHyperlinkDataframeColumn(
-                        dfOrg,
-                        lambda r: r.BAUFTRAG,
-                        lambda r: server.makeWebLinkBauftrag(bauftrag=r.BAUFTRAG))
-
-    colNames = {
-        "BAUFTRAG": "Betriebsauftrag",
-        "POSITION": "Pos",
-        "MENGENABWEICHUNG": "Mengenabweichung",
-        "MENGE": "Menge",
-        "MENGE_IST": "Menge-Ist",
-        "ARTIKEL": "Artikel",
-        "ARTIKELNAME": "Artikel-Name",
-        "UPDDATE": "geändert am",
-        "UPDNAME": "geändert von"
-    }
-    df.rename(columns=colNames, inplace=True)
+    dfOrg = PyAPplus64.pandas.pandasReadSqlArrow(server, sql)
+
+    # stark wiederholte Spalten als category speichern; so wird jeder
+    # eindeutige Wert nur einmal als String gehalten
+    for c in ('UPDNAME', 'ARTIKEL', 'ARTIKELNAME'):
+        if c in dfOrg.columns:
+            dfOrg[c] = dfOrg[c].astype('category')
+
+    # die URLs für die Hyperlinks werden vektorisiert in pandas gebaut;
+    # in SQL ließen sich die Werte nicht sinnvoll percent-kodieren
+    bauftragQ = _quoteSeries(dfOrg['BAUFTRAG'])
+    wauftragUrl = (server.makeWebLinkWauftrag() + "?bauftrag=" + bauftragQ
+                   + "&accessid=" + dfOrg['ID'].astype(str))
+    bauftragUrl = server.makeWebLinkBauftrag() + "?bauftrag=" + bauftragQ
+
+    # Ergebnis spaltenweise zusammensetzen; vermeidet das komplette
+    # Kopieren von dfOrg nur um danach ID zu verwerfen und umzubenennen
+    df = pd.DataFrame({
+        "Betriebsauftrag": PyAPplus64.pandas.mkHyperlinkSeries(dfOrg['BAUFTRAG'], bauftragUrl),
+        "Pos": PyAPplus64.pandas.mkHyperlinkSeries(dfOrg['POSITION'], wauftragUrl),
+        "Mengenabweichung": dfOrg['MENGENABWEICHUNG'],
+        "Menge": dfOrg['MENGE'],
+        "Menge-Ist": dfOrg['MENGE_IST'],
+        "Artikel": dfOrg['ARTIKEL'],
+        "Artikel-Name": dfOrg['ARTIKELNAME'],
+        "geändert am": dfOrg['UPDDATE'],
+        "geändert von": dfOrg['UPDNAME']
+    })
 
     return df
 
@@ -76,48 +92,48 @@ def ladeAlleWerkstattauftragPosMengenabweichungen(
     sql.addFieldsTable("w", "MENGE", "MENGE_IST", "APLAN as ARTIKEL")
     sql.addFields("w.UPDDATE", "p.NAME as UPDNAME")
 
-    sql.where.addConditionFieldEq("w.STATUS", 4)
-    sql.where.addCondition("abs(w.MENGE-w.MENGE_IST) > 0.001")
-    sql.where.addCondition(cond)
+    sql.where.addCondition(_condStatusEq4)
+    sql.where.addCondition(_condAbsDiff)
+    if not (cond is None):
+        sql.where.addCondition(cond)
     sql.order = "w.UPDDATE"
 
-    dfOrg = PyAPplus64.pandas.pandasReadSql(server, sql)
-
-    # Add Links
-    df = dfOrg.copy()
-    df = df.drop(columns=["ID"])
-    df['POSITION'] = PyAPplus64.pandas.mkHyperlinkDataframeColumn(
-                        dfOrg,
-                        lambda r: r.POSITION,
-                        lambda r: server.makeWebLinkWauftrag(
-                            bauftrag=r.BAUFTRAG, accessid=r.ID))
-    df['BAUFTRAG'] = PyAPplus64.pandas.mkHyperlinkDataframeColumn(
-                        dfOrg,
-                        lambda r: r.BAUFTRAG,
-                        lambda r: server.makeWebLinkBauftrag(bauftrag=r.BAUFTRAG))
-    df['AG'] = PyAPplus64.pandas.mkHyperlinkDataframeColumn(
-                        dfOrg,
-                        lambda r: r.AG,
-                        lambda r: server.makeWebLinkWauftragPos(
-                            bauftrag=r.BAUFTRAG, position=r.POSITION, accessid=r.ID))
+    dfOrg = PyAPplus64.pandas.pandasReadSqlArrow(server, sql)
+
+    # stark wiederholte Spalten als category speichern; so wird jeder
+    # eindeutige Wert nur einmal als String gehalten
+    for c in ('UPDNAME', 'ARTIKEL', 'ARTIKELNAME'):
+        if c in dfOrg.columns:
+            dfOrg[c] = dfOrg[c].astype('category')
+
+    # die URLs für die Hyperlinks werden vektorisiert in pandas gebaut;
+    # in SQL ließen sich die Werte nicht sinnvoll percent-kodieren
+    bauftragQ = _quoteSeries(dfOrg['BAUFTRAG'])
+    idS = dfOrg['ID'].astype(str)
+    wauftragUrl = (server.makeWebLinkWauftrag() + "?bauftrag=" + bauftragQ
+                   + "&accessid=" + idS)
+    bauftragUrl = server.makeWebLinkBauftrag() + "?bauftrag=" + bauftragQ
+    wauftragPosUrl = (server.makeWebLinkWauftragPos() + "?bauftrag=" + bauftragQ
+                      + "&position=" + _quoteSeries(dfOrg['POSITION'])
+                      + "&accessid=" + idS)
 
     # Demo zum Hinzufügen einer berechneten Spalte
     # df['BAUFPOSAG'] = PyAPplus64.pandas.mkDataframeColumn(dfOrg,
     #                     lambda r: "{}.{} AG {}".format(r.BAUFTRAG, r.POSITION, r.AG))
 
-    # Rename Columns
-    colNames = {
-        "BAUFTRAG": "Betriebsauftrag",
-        "POSITION": "Pos",
-        "AG": "AG",
-        "MENGENABWEICHUNG": "Mengenabweichung",
-        "MENGE": "Menge",
-        "MENGE_IST": "Menge-Ist",
-        "ARTIKEL": "Artikel",
-        "UPDDATE": "geändert am",
-        "UPDNAME": "geändert von"
-    }
-    df.rename(columns=colNames, inplace=True)
+    # Ergebnis spaltenweise zusammensetzen; vermeidet das komplette
+    # Kopieren von dfOrg nur um danach ID zu verwerfen und umzubenennen
+    df = pd.DataFrame({
+        "Betriebsauftrag": PyAPplus64.pandas.mkHyperlinkSeries(dfOrg['BAUFTRAG'], bauftragUrl),
+        "Pos": PyAPplus64.pandas.mkHyperlinkSeries(dfOrg['POSITION'], wauftragUrl),
+        "AG": PyAPplus64.pandas.mkHyperlinkSeries(dfOrg['AG'], wauftragPosUrl),
+        "Mengenabweichung": dfOrg['MENGENABWEICHUNG'],
+        "Menge": dfOrg['MENGE'],
+        "Menge-Ist": dfOrg['MENGE_IST'],
+        "Artikel": dfOrg['ARTIKEL'],
+        "geändert am": dfOrg['UPDDATE'],
+        "geändert von": dfOrg['UPDNAME']
+    })
     return df
 
 
@@ -137,15 +153,19 @@ def computeFileName(year: Optional[int] = None, month: Optional[int] = None) ->
         return 'mengenabweichungen-all.xlsx'
     else:
         if month is None:
-            return 'mengenabweichungen-{:04d}.xlsx'.format(year)
+            return f'mengenabweichungen-{year:04d}.xlsx'
         else:
-            return 'mengenabweichungen-{:04d}-{:02d}.xlsx'.format(year, month)
+            return f'mengenabweichungen-{year:04d}-{month:02d}.xlsx'
 
 
 def _exportInternal(server: PyAPplus64.APplusServer, fn: str,
                     cond: Union[PyAPplus64.SqlCondition, str, None]) -> int:
-    df1 = ladeAlleWerkstattauftragMengenabweichungen(server, cond)
-    df2 = ladeAlleWerkstattauftragPosMengenabweichungen(server, cond)
+    # beide Abfragen laufen parallel auf eigenen DB-Verbindungen
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+        f1 = executor.submit(ladeAlleWerkstattauftragMengenabweichungen, server, cond)
+        f2 = executor.submit(ladeAlleWerkstattauftragPosMengenabweichungen, server, cond)
+        df1 = f1.result()
+        df2 = f2.result()
     print("erzeuge " + fn)
     PyAPplus64.pandas.exportToExcel(fn, [(df1, "WAuftrag"), (df2, "WAuftrag-Pos")], addTable=True)
     return len(df1.index) + len(df2.index)
@@ -165,17 +185,13 @@ def exportYearMonth(server: PyAPplus64.APplusServer,
 
 
 def computePreviousMonthYear(cyear: int, cmonth: int) -> Tuple[int, int]:
-    if cmonth == 1:
-        return (cyear-1, 12)
-    else:
-        return (cyear, cmonth-1)
+    prev = datetime.date(cyear, cmonth, 1) - relativedelta(months=1)
+    return (prev.year, prev.month)
 
 
 def computeNextMonthYear(cyear: int, cmonth: int) -> Tuple[int, int]:
-    if cmonth == 12:
-        return (cyear+1, 1)
-    else:
-        return (cyear, cmonth+1)
+    next = datetime.date(cyear, cmonth, 1) + relativedelta(months=1)
+    return (next.year, next.month)
 
 
 def main(confFile: Union[str, pathlib.Path], user: Optional[str] = None, env: Optional[str] = None) -> None:
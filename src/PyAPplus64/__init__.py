@@ -6,25 +6,49 @@
 # license that can be found in the LICENSE file or at
 # https://opensource.org/licenses/MIT.
 
-from . import utils
-from . import applus_db
-from . import applus_scripttool
-from . import applus_server
-from . import applus_sysconf
-from . import applus_usexml
-from . import applus
-from . import sql_utils
-from . import duplicate
-from . import utils
-
-from .applus import APplusServer, applusFromConfigFile
-from .sql_utils import (
-    SqlCondition,
-    SqlStatement,
-    SqlStatementSelect
-)
-
-try:
-    from . import pandas
-except:
-    pass
+# Die Untermodule werden erst bei der ersten Benutzung geladen (PEP 562).
+# So zahlen Scripte, die z.B. kein pandas benutzen, nicht die Importkosten
+# von pandas, pyodbc, lxml usw. beim Start.
+
+import importlib
+from typing import Any, List
+
+_submodules = {
+    "applus",
+    "applus_async",
+    "applus_db",
+    "applus_job",
+    "applus_scripttool",
+    "applus_server",
+    "applus_sysconf",
+    "applus_usexml",
+    "duplicate",
+    "pandas",
+    "sql_utils",
+    "utils",
+}
+
+_reexports = {
+    "APplusServer": "applus",
+    "applusFromConfigFile": "applus",
+    "SqlCondition": "sql_utils",
+    "SqlStatement": "sql_utils",
+    "SqlStatementSelect": "sql_utils",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _submodules:
+        mod = importlib.import_module("." + name, __name__)
+        globals()[name] = mod
+        return mod
+    if name in _reexports:
+        mod = importlib.import_module("." + _reexports[name], __name__)
+        value = getattr(mod, name)
+        globals()[name] = value
+        return value
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals().keys()) | _submodules | set(_reexports.keys()))
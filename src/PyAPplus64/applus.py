@@ -14,15 +14,69 @@ from . import applus_scripttool
 from . import applus_usexml
 from . import sql_utils
 import yaml
+import collections
+import concurrent.futures
+import contextlib
+import copy
+import functools
+import queue
+import threading
+import time
 import json
+import pathlib
 import urllib.parse
 from zeep import Client
 import pyodbc  # type: ignore
-from typing import TYPE_CHECKING, Optional, Any, Callable, Dict, Sequence, Set, List
+from typing import TYPE_CHECKING, Optional, Any, Callable, Dict, FrozenSet, Iterator, Sequence, Set, List
+
+# der libyaml-basierte Loader ist deutlich schneller als der reine
+# Python-Parser, steht aber nicht in jeder Umgebung zur Verfügung
+try:
+    from yaml import CSafeLoader as SafeYamlLoader
+except ImportError:
+    from yaml import SafeLoader as SafeYamlLoader  # type: ignore[assignment]
+
+# orjson serialisiert deutlich schneller als das json-Modul, ist aber
+# nur eine optionale Abhängigkeit; ohne orjson wird json verwendet
+try:
+    import orjson
+
+    def _dumpsJson(obj: Any) -> str:
+        return orjson.dumps(obj).decode()
+except ImportError:
+    def _dumpsJson(obj: Any) -> str:
+        return json.dumps(obj)
 
 if TYPE_CHECKING:
     from _typeshed import FileDescriptorOrPath
 
+_POOL_VALIDATE_IDLE_SECONDS = 60.0
+"""lag eine Pool-Verbindung länger als diese Zeit unbenutzt, wird sie vor
+   der Wiederverwendung mit einer Mini-Query geprüft; frisch freigegebene
+   Verbindungen werden ohne Prüfung zurückgegeben"""
+
+
+class NoWebBaseURLError(Exception):
+    """Fehler, der geworfen wird, wenn Weblinks ohne konfigurierte
+       Webserver-BaseURL erzeugt werden sollen."""
+    pass
+
+
+@functools.lru_cache(maxsize=None)
+def _getTableFieldsSQL(isComputed: Optional[bool]) -> str:
+    """Baut das SQL-Statement für :meth:`APplusServer.getTableFields`.
+       Die Struktur ist statisch, nur der Tabellen-Name ist ein Parameter;
+       der Aufbau passiert daher höchstens einmal je isComputed-Wert."""
+    sql = sql_utils.SqlStatementSelect("SYS.TABLES T")
+    join = sql.addInnerJoin("SYS.COLUMNS C")
+    join.on.addConditionFieldsEq("T.Object_ID", "C.Object_ID")
+    if not (isComputed is None):
+        join.on.addConditionFieldEq("c.is_computed", isComputed)
+    sql.addFields("C.NAME")
+
+    sql.where.addConditionFieldEq("t.name", sql_utils.SqlParam())
+    return str(sql)
+
 
 class APplusServer:
     """
@@ -37,7 +91,8 @@ class APplusServer:
     """
     def __init__(self,
                  db_settings: applus_db.APplusDBSettings,
-                 server_settings: applus_server.APplusServerSettings):
+                 server_settings: applus_server.APplusServerSettings,
+                 dbPoolMaxSize: int = 8):
 
         self.db_settings: applus_db.APplusDBSettings = db_settings
         """Die Einstellungen für die Datenbankverbindung"""
@@ -45,49 +100,102 @@ class APplusServer:
         self.server_settings : applus_server.APplusServerSettings = server_settings
         """Einstellung für die Verbindung zum APP- und Webserver"""
 
-        self._db_conn_pool = list()
-        """Eine Liste bestehender DB-Verbindungen"""
-
-        self.server_conn: applus_server.APplusServerConnection = applus_server.APplusServerConnection(server_settings)
+        self._db_conn_pool: 'queue.LifoQueue[pyodbc.Connection]' = queue.LifoQueue()
+        """Pool bestehender DB-Verbindungen; LIFO, damit zuletzt benutzte
+           (und damit noch warme) Verbindungen zuerst wiederverwendet werden"""
+
+        self._db_pool_max_size = dbPoolMaxSize
+        """maximale Anzahl von Verbindungen, die im Pool gehalten werden;
+           überzählige Verbindungen werden bei der Freigabe geschlossen"""
+
+        self._db_conn_sema = threading.BoundedSemaphore(dbPoolMaxSize)
+        """begrenzt die Gesamtzahl gleichzeitig offener Pool-Verbindungen;
+           jede offene Verbindung hält genau ein Token"""
+
+        self._connIdleSince: Dict[int, float] = {}
+        """Zeitpunkt (time.monotonic) der Freigabe je im Pool liegender
+           Verbindung; steuert, ob sie vor der Wiederverwendung geprüft wird"""
+
+        self._completeSQLCache: 'collections.OrderedDict[str, str]' = collections.OrderedDict()
+        """Cache für :meth:`completeSQL`; das Vervollständigen hängt nur vom
+           SQL-Text und dem Mandanten ab und erfordert sonst pro Aufruf einen
+           SOAP-Roundtrip zum AppServer"""
+
+        self._completeSQLCacheMaxSize = 2048
+
+        self._tableFieldsCache: Dict[Any, FrozenSet[str]] = {}
+        """Cache für :meth:`getTableFields`, Key (table, isComputed)"""
+
+        self._tableFieldsSQLCache: Dict[Optional[bool], str] = {}
+        """Cache für das vervollständigte SQL von :meth:`getTableFields`,
+           Key ist der isComputed-Wert"""
+
+        self._uniqueFieldsCache: Dict[str, Dict[str, List[str]]] = {}
+        """Cache für :meth:`getUniqueFieldsOfTable`"""
+
+        self._knownTablesCache: Optional[frozenset] = None
+        """Schnappschuss aller Tabellennamen für :meth:`isDBTableKnown`;
+           wird beim ersten Aufruf mit einer einzigen Query gefüllt"""
+
+        self._webserverBase: Optional[str] = None
+        """die Webserver-BaseURL als fertiger String oder None; einmal beim
+           Konstruieren berechnet, damit makeWebLink sie nicht pro Aufruf
+           prüfen und stringifizieren muss"""
+        if server_settings.webserver:
+            self._webserverBase = str(server_settings.webserver)
+
+        self._webLinkPrefixCache: Dict[str, str] = {}
+        """Cache fertig zusammengesetzter URL-Präfixe (BaseURL + Seite)"""
+
+        self._soapPool = concurrent.futures.ThreadPoolExecutor(max_workers=8)
+        """Thread-Pool für parallele SOAP-Aufrufe; das Warten auf den
+           AppServer gibt das GIL frei, so dass mehrere Aufrufe wirklich
+           gleichzeitig laufen"""
+
+        self._sharedCursorCache: Dict[int, Any] = {}
+        """pro Pool-Verbindung ein wiederverwendeter Cursor für die
+           Single-Row/-Value-Abfragen; spart das Anlegen und Schließen
+           eines Cursors pro Mini-Query, siehe :meth:`_getSharedCursor`"""
+
+    # die Hilfsobjekte und Clients werden erst beim ersten Zugriff erzeugt
+    # (die SOAP-Seite ist für reine DB-Skripte unnötig); cached_property
+    # ersetzt nach dem ersten Aufruf den Property-Zugriff durch einen
+    # Attribut-Zugriff
+    @functools.cached_property
+    def server_conn(self) -> applus_server.APplusServerConnection:
         """erlaubt den Zugriff auf den AppServer"""
+        return applus_server.APplusServerConnection(self.server_settings)
 
-        self.sysconf: applus_sysconf.APplusSysConf = applus_sysconf.APplusSysConf(self)
+    @functools.cached_property
+    def sysconf(self) -> applus_sysconf.APplusSysConf:
         """erlaubt den Zugriff auf die Sysconfig"""
+        return applus_sysconf.APplusSysConf(self)
 
-        self.job: applus_job.APplusJob = applus_job.APplusJob(self)
+    @functools.cached_property
+    def job(self) -> applus_job.APplusJob:
         """erlaubt Arbeiten mit Jobs"""
+        return applus_job.APplusJob(self)
 
-        self.scripttool: applus_scripttool.APplusScriptTool = applus_scripttool.APplusScriptTool(self)
+    @functools.cached_property
+    def scripttool(self) -> applus_scripttool.APplusScriptTool:
         """erlaubt den einfachen Zugriff auf Funktionen des ScriptTools"""
+        return applus_scripttool.APplusScriptTool(self)
 
-        self._client_table = None
-        self._client_xml = None
-        self._client_nummer = None
-        self._client_adaptdb= None
-
-    @property
+    @functools.cached_property
     def client_table(self) -> Client:
-        if not self._client_table:
-          self._client_table = self.getAppClient("p2core", "Table")
-        return self._client_table
+        return self.getAppClient("p2core", "Table")
 
-    @property
+    @functools.cached_property
     def client_xml(self) -> Client:
-        if not self._client_xml:
-          self._client_xml = self.getAppClient("p2core", "XML")
-        return self._client_xml
+        return self.getAppClient("p2core", "XML")
 
-    @property
+    @functools.cached_property
     def client_nummer(self) -> Client:
-        if not self._client_nummer:
-          self._client_nummer = self.getAppClient("p2system", "Nummer")
-        return self._client_nummer
+        return self.getAppClient("p2system", "Nummer")
 
-    @property
+    @functools.cached_property
     def client_adaptdb(self) -> Client:
-        if not self._client_adaptdb:
-          self._client_adaptdb = self.getAppClient("p2dbtools", "AdaptDB")
-        return self._client_adaptdb
+        return self.getAppClient("p2dbtools", "AdaptDB")
 
 
     def getDBConnection(self) -> pyodbc.Connection:
@@ -95,26 +203,134 @@ class APplusServer:
         Liefert eine pyodbc-Connection zur APplus DB. Diese muss genutzt werden, wenn mehrere Operationen in einer Transaktion
         genutzt werden sollen. Ansonsten sind die Hilfsmethoden wie :meth:`APplusServer.dbQuery` zu bevorzugen.
         Diese Connection kann in Verbindung mit den Funktionen aus :mod:`PyAPplus64.applus_db` genutzt werden.
-        Die Verbindung sollte nach Benutzung wieder freigegeben oder geschlossen werden.
+        Die Verbindung sollte nach Benutzung mit :meth:`releaseDBConnection` wieder freigegeben
+        oder mit :meth:`closeDBConnection` geschlossen werden. Ein direktes ``conn.close()``
+        gibt das Pool-Token nicht zurück und verkleinert damit dauerhaft die Pool-Kapazität.
         """
-        if self._db_conn_pool:
-            return self._db_conn_pool.pop()
-        else:
-            conn = self.db_settings.connect()
-            self._db_conn_pool.append(conn)
-            return conn
+        while True:
+            try:
+                conn = self._db_conn_pool.get_nowait()
+            except queue.Empty:
+                # die Gesamtzahl offener Verbindungen ist über die Semaphore
+                # begrenzt; ist noch ein Token frei, wird eine neue
+                # Verbindung geöffnet
+                if self._db_conn_sema.acquire(blocking=False):
+                    try:
+                        # autocommit spart für die typischen Einzel-Queries die
+                        # implizite Transaktion pro Statement; wer explizite
+                        # Transaktionen braucht, kann conn.autocommit=False setzen
+                        return self.db_settings.connect(autocommit=True)
+                    except:
+                        self._db_conn_sema.release()
+                        raise
+                # alle Tokens vergeben: auf eine in den Pool zurückgelegte
+                # Verbindung warten. Das Warten passiert auf der Queue, nicht
+                # auf der Semaphore; releaseDBConnection legt Verbindungen
+                # nur in die Queue zurück, ohne ihr Token freizugeben. Das
+                # Timeout sorgt dafür, dass auch ein über closeDBConnection
+                # frei gewordenes Token im nächsten Durchlauf bemerkt wird.
+                try:
+                    conn = self._db_conn_pool.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+            # tote Verbindungen (z.B. nach Server-Neustart) aussortieren.
+            # Geprüft wird mit einer Mini-Query über den geteilten Cursor;
+            # pyodbc bietet keinen Zugriff auf SQL_ATTR_CONNECTION_DEAD
+            # (getinfo akzeptiert nur SQLGetInfo-Typen). Frisch freigegebene
+            # Verbindungen gelten ohne Prüfung als lebendig.
+            idleSince = self._connIdleSince.pop(id(conn), None)
+            if (idleSince is None) or (time.monotonic() - idleSince < _POOL_VALIDATE_IDLE_SECONDS):
+                return conn
+            try:
+                cur = self._getSharedCursor(conn)
+                cur.execute("select 1")
+                cur.fetchone()
+                return conn
+            except pyodbc.Error:
+                pass
+            self._discardDBConnection(conn)
+
+    def _getSharedCursor(self, conn: pyodbc.Connection) -> Any:
+        """liefert den wiederverwendeten Cursor einer Pool-Verbindung;
+           beim ersten Zugriff wird er angelegt.
+
+           Schließt ein Aufrufer eine Verbindung selbst statt sie
+           freizugeben, bleibt ihr Cache-Eintrag stehen und CPython kann
+           die id() für eine neue Verbindung wiederverwenden. Der Cursor
+           wird daher nur akzeptiert, wenn er wirklich zu dieser Verbindung
+           gehört; sonst wird der veraltete Eintrag ersetzt."""
+        cur = self._sharedCursorCache.get(id(conn))
+        if (cur is None) or not (cur.connection is conn):
+            cur = conn.cursor()
+            self._sharedCursorCache[id(conn)] = cur
+        return cur
+
+    def _discardDBConnection(self, conn: pyodbc.Connection) -> None:
+        """schließt eine Pool-Verbindung endgültig und gibt ihr Token frei"""
+        self._connIdleSince.pop(id(conn), None)
+        cur = self._sharedCursorCache.pop(id(conn), None)
+        if not (cur is None):
+            try:
+                cur.close()
+            except:
+                pass
+        try:
+            conn.close()
+        except:
+            pass
+        try:
+            self._db_conn_sema.release()
+        except ValueError:
+            pass
+
+    def closeDBConnection(self, conn: pyodbc.Connection) -> None:
+        """Schließt eine mit :meth:`getDBConnection` geholte Verbindung
+           endgültig, statt sie in den Pool zurückzulegen, und gibt ihr
+           Token frei. Ein direktes ``conn.close()`` würde das Token
+           behalten und die Pool-Kapazität dauerhaft verkleinern."""
+        self._discardDBConnection(conn)
 
     def releaseDBConnection(self, conn : pyodbc.Connection) -> None:
-        """Gibt eine DB-Connection zur Wiederverwendung frei"""
-        self._db_conn_pool.append(conn)
+        """Gibt eine DB-Connection zur Wiederverwendung frei. Eine vom
+           Aufrufer bereits geschlossene oder kaputte Verbindung wird
+           ausgetragen statt zurückgelegt."""
+        if self._db_conn_pool.qsize() < self._db_pool_max_size:
+            # falls ein Aufrufer autocommit für explizite Transaktionen
+            # abgeschaltet hat, den Pool-Zustand wiederherstellen; auf
+            # einer geschlossenen Verbindung wirft pyodbc hier
+            try:
+                if not conn.autocommit:
+                    conn.autocommit = True
+            except pyodbc.Error:
+                self._discardDBConnection(conn)
+                return
+            self._connIdleSince[id(conn)] = time.monotonic()
+            self._db_conn_pool.put(conn)
+        else:
+            self._discardDBConnection(conn)
+
+    @contextlib.contextmanager
+    def _acquireDBConnection(self) -> Iterator[pyodbc.Connection]:
+        """Context-Manager, der eine DB-Verbindung aus dem Pool holt und sie
+           nach Benutzung wieder freigibt. Bei einer Exception wird die
+           Verbindung verworfen statt zurückgelegt, da ihr Zustand
+           (offene Transaktion, halb gelesene Cursor) unklar ist."""
+        conn = self.getDBConnection()
+        try:
+            yield conn
+        except:
+            self._discardDBConnection(conn)
+            raise
+        else:
+            self.releaseDBConnection(conn)
 
     def reconnectDB(self) -> None:
-        for conn in self._db_conn_pool:
+        while True:
             try:
-                conn.close()
-            except:
-                pass
-        self._db_conn_pool = list()
+                conn = self._db_conn_pool.get_nowait()
+            except queue.Empty:
+                break
+            self._discardDBConnection(conn)
 
     def completeSQL(self, sql: sql_utils.SqlStatement, raw: bool = False) -> str:
         """
@@ -130,40 +346,116 @@ class APplusServer:
         if raw:
             return str(sql)
         else:
-            return self.client_table.service.getCompleteSQL(sql)
+            key = str(sql)
+            res = self._completeSQLCache.get(key)
+            if res is None:
+                res = self.client_table.service.getCompleteSQL(key)
+                self._completeSQLCache[key] = res
+                if len(self._completeSQLCache) > self._completeSQLCacheMaxSize:
+                    self._completeSQLCache.popitem(last=False)
+            else:
+                self._completeSQLCache.move_to_end(key)
+            return res
+
+    def completeSQLBatch(self, sqls: Sequence[sql_utils.SqlStatement], raw: bool = False) -> List[str]:
+        """
+        Vervollständigt mehrere SQL-Statements auf einmal. Bereits gecachte
+        Statements werden aus dem Cache bedient; die übrigen SOAP-Aufrufe
+        laufen parallel, da das Warten auf den AppServer das GIL freigibt.
+        Der AppServer bietet keine Bulk-Methode, so werden zumindest die
+        Roundtrips überlappt statt nacheinander ausgeführt.
+
+        :param sqls: die SQL Statements
+        :param raw: soll completeSQL ausgeführt werden? Falls True, werden die Eingaben zurückgeliefert
+        :return: die vervollständigten SQL-Statements in Eingabe-Reihenfolge
+        :rtype: List[str]
+        """
+        keys = [str(sql) for sql in sqls]
+        if raw:
+            return keys
+
+        missing = []
+        for key in keys:
+            if not (key in self._completeSQLCache) and not (key in missing):
+                missing.append(key)
+        if missing:
+            for key, res in zip(missing, self._soapPool.map(self.client_table.service.getCompleteSQL, missing)):
+                self._completeSQLCache[key] = res
+                if len(self._completeSQLCache) > self._completeSQLCacheMaxSize:
+                    self._completeSQLCache.popitem(last=False)
+        return [self.completeSQL(key) for key in keys]
+
+    def invalidateCompleteSQLCache(self) -> None:
+        """Leert den Cache von :meth:`completeSQL`. Dies ist nötig, wenn sich
+           serverseitig die Vervollständigung ändert, z.B. nach einem
+           Mandantenwechsel."""
+        self._completeSQLCache.clear()
 
     def dbQueryAll(self, sql: sql_utils.SqlStatement, *args: Any, raw: bool = False,
                    apply: Optional[Callable[[pyodbc.Row], Any]] = None) -> Any:
         """Führt eine SQL Query aus und liefert alle Zeilen zurück. Das SQL wird zunächst
            vom Server angepasst, so dass z.B. Mandanteninformation hinzugefügt werden."""
-        sqlC = self.completeSQL(sql, raw=raw)
-        conn = self.getDBConnection()
-        res = applus_db.rawQueryAll(conn, sqlC, *args, apply=apply)
-        self.releaseDBConnection(conn)
-        return res
-
+        sqlC = str(sql) if raw else self.completeSQL(sql)
+        with self._acquireDBConnection() as conn:
+            return applus_db.rawQueryAll(conn, sqlC, *args, apply=apply)
+
+
+    def dbQueryAllToSet(self, sql: sql_utils.SqlStatement, *args: Any, raw: bool = False,
+                        apply: Callable[[pyodbc.Row], Any]) -> Set[Any]:
+        """Führt eine SQL Query aus und sammelt die per apply projizierten
+           Zeilen direkt in eine Menge, ohne Zwischenliste. Das SQL wird
+           zunächst vom Server angepasst, so dass z.B. Mandanteninformation
+           hinzugefügt werden."""
+        sqlC = str(sql) if raw else self.completeSQL(sql)
+        with self._acquireDBConnection() as conn:
+            return applus_db.rawQueryAllToSet(conn, sqlC, *args, apply=apply)
+
+    def dbQueryIter(self, sql: sql_utils.SqlStatement, *args: Any, raw: bool = False,
+                    arraysize: int = 1000,
+                    apply: Optional[Callable[[pyodbc.Row], Any]] = None) -> Iterator[Any]:
+        """Führt eine SQL Query aus und liefert die Zeilen einzeln als Generator.
+           Im Gegensatz zu :meth:`dbQueryAll` werden nie alle Zeilen gleichzeitig
+           im Speicher gehalten. Das SQL wird zunächst vom Server angepasst,
+           so dass z.B. Mandanteninformation hinzugefügt werden."""
+        sqlC = str(sql) if raw else self.completeSQL(sql)
+        with self._acquireDBConnection() as conn:
+            yield from applus_db.rawQueryIter(conn, sqlC, *args, arraysize=arraysize, apply=apply)
 
     def dbQuerySingleValues(self, sql: sql_utils.SqlStatement, *args: Any, raw: bool = False) -> Sequence[Any]:
         """Führt eine SQL Query aus, die nur eine Spalte zurückliefern soll."""
-        return self.dbQueryAll(sql, *args, raw=raw, apply=lambda r: r[0])
+        sqlC = str(sql) if raw else self.completeSQL(sql)
+        with self._acquireDBConnection() as conn:
+            return applus_db.rawQueryFirstColumn(conn, sqlC, *args)
 
     def dbQuery(self, sql: sql_utils.SqlStatement, f: Callable[[pyodbc.Row], None], *args: Any, raw: bool = False) -> None:
         """Führt eine SQL Query aus und führt für jede Zeile die übergeben Funktion aus.
            Das SQL wird zunächst vom Server angepasst, so dass z.B. Mandanteninformation hinzugefügt werden."""
-        sqlC = self.completeSQL(sql, raw=raw)
-        conn = self.getDBConnection()
-        res = applus_db.rawQuery(conn, sqlC, f, *args)
-        self.releaseDBConnection(conn)
-        return res
-
+        sqlC = str(sql) if raw else self.completeSQL(sql)
+        with self._acquireDBConnection() as conn:
+            return applus_db.rawQuery(conn, sqlC, f, *args)
+
+
+    def dbQueryBatched(self, sql: sql_utils.SqlStatement,
+                       fbatch: Callable[[Sequence[pyodbc.Row]], None], *args: Any,
+                       raw: bool = False, arraysize: int = 1000) -> None:
+        """Führt eine SQL Query aus und übergibt die Zeilen blockweise an die
+           Funktion fbatch, siehe :func:`applus_db.rawQueryBatched`. Das SQL
+           wird zunächst vom Server angepasst, so dass z.B.
+           Mandanteninformation hinzugefügt werden."""
+        sqlC = str(sql) if raw else self.completeSQL(sql)
+        with self._acquireDBConnection() as conn:
+            applus_db.rawQueryBatched(conn, sqlC, fbatch, *args, arraysize=arraysize)
 
     def dbQuerySingleRow(self, sql: sql_utils.SqlStatement, *args: Any, raw: bool = False) -> Optional[pyodbc.Row]:
-        """Führt eine SQL Query aus, die maximal eine Zeile zurückliefern soll. Diese Zeile wird geliefert."""
-        sqlC = self.completeSQL(sql, raw=raw)
-        conn = self.getDBConnection()
-        res = applus_db.rawQuerySingleRow(conn, sqlC, *args)
-        self.releaseDBConnection(conn)
-        return res
+        """Führt eine SQL Query aus, die maximal eine Zeile zurückliefern soll. Diese Zeile wird geliefert.
+           Verwendet den geteilten Cursor der Pool-Verbindung, so dass nicht
+           pro Mini-Query ein Cursor angelegt und geschlossen wird."""
+        sqlC = str(sql) if raw else self.completeSQL(sql)
+        with self._acquireDBConnection() as conn:
+            cursor = self._getSharedCursor(conn)
+            applus_db._logSQLWithArgs(sqlC, *args)
+            cursor.execute(sqlC, *args)
+            return cursor.fetchone()
 
     def dbQuerySingleRowDict(self, sql: sql_utils.SqlStatement, *args: Any, raw: bool = False) -> Optional[Dict[str, Any]]:
         """Führt eine SQL Query aus, die maximal eine Zeile zurückliefern soll.
@@ -176,27 +468,98 @@ class APplusServer:
 
     def dbQuerySingleValue(self, sql: sql_utils.SqlStatement, *args: Any, raw: bool = False) -> Any:
         """Führt eine SQL Query aus, die maximal einen Wert zurückliefern soll.
-           Dieser Wert oder None wird geliefert."""
-        sqlC = self.completeSQL(sql, raw=raw)
-        conn = self.getDBConnection()
-        res = applus_db.rawQuerySingleValue(conn, sqlC, *args)
-        self.releaseDBConnection(conn)
+           Dieser Wert oder None wird geliefert. Verwendet wie
+           :meth:`dbQuerySingleRow` den geteilten Cursor der Pool-Verbindung."""
+        sqlC = str(sql) if raw else self.completeSQL(sql)
+        with self._acquireDBConnection() as conn:
+            cursor = self._getSharedCursor(conn)
+            applus_db._logSQLWithArgs(sqlC, *args)
+            cursor.execute(sqlC, *args)
+            row = cursor.fetchone()
+            if row:
+                return row[0]
+            else:
+                return None
+
+    def dbQueryMany(self, sqls: Sequence[sql_utils.SqlStatement],
+                    argsList: Optional[Sequence[Sequence[Any]]] = None,
+                    raw: bool = False) -> List[Sequence[Any]]:
+        """Führt mehrere SQL Queries aus und liefert die Ergebnisse in
+           Eingabe-Reihenfolge. Die Statements werden gemeinsam per
+           :meth:`completeSQLBatch` vervollständigt und dann über eine
+           einzige DB-Verbindung ausgeführt, statt pro Query einen
+           SOAP-Roundtrip und einen Verbindungs-Checkout zu bezahlen.
+
+           :param sqls: die SQL Statements
+           :param argsList: optional je Statement die Parameter
+           :param raw: soll completeSQL übersprungen werden?
+           """
+        sqlCs = self.completeSQLBatch(sqls, raw=raw)
+        if argsList is None:
+            argsList = [()] * len(sqlCs)
+        res = []
+        with self._acquireDBConnection() as conn:
+            for sqlC, args in zip(sqlCs, argsList):
+                res.append(applus_db.rawQueryAll(conn, sqlC, *args))
         return res
 
+    def dbExecuteMany(self, sql: sql_utils.SqlStatement,
+                      argsList: Sequence[Sequence[Any]], raw: bool = False,
+                      fast: bool = True) -> None:
+        """Führt ein SQL Statement (z.B. update oder insert) einmal pro
+           Parametersatz aus; das SQL wird nur einmal vervollständigt und
+           alle Parametersätze werden gebündelt an den Treiber übergeben
+           (executemany), siehe :func:`applus_db.rawExecuteMany`."""
+        sqlC = str(sql) if raw else self.completeSQL(sql)
+        with self._acquireDBConnection() as conn:
+            applus_db.rawExecuteMany(conn, sqlC, argsList, fast=fast)
+
     def dbExecute(self, sql: sql_utils.SqlStatement, *args: Any, raw: bool = False) -> Any:
         """Führt ein SQL Statement (z.B. update oder insert) aus. Das SQL wird zunächst
            vom Server angepasst, so dass z.B. Mandanteninformation hinzugefügt werden."""
-        sqlC = self.completeSQL(sql, raw=raw)
-        conn = self.getDBConnection()
-        res = applus_db.rawExecute(conn, sqlC, *args)
-        self.releaseDBConnection(conn)
-        return res
+        sqlC = str(sql) if raw else self.completeSQL(sql)
+        with self._acquireDBConnection() as conn:
+            return applus_db.rawExecute(conn, sqlC, *args)
+
+    def prepare(self, sql: sql_utils.SqlStatement, raw: bool = False) -> 'PreparedStatement':
+        """
+        Bereitet ein SQL-Statement für wiederholte Ausführung mit
+        unterschiedlichen Parametern vor. Das SQL wird genau einmal
+        vervollständigt; danach wird bei jeder Ausführung derselbe
+        SQL-Text an den Treiber übergeben, so dass dessen Statement-Cache
+        den Ausführungsplan wiederverwenden kann, statt das Statement pro
+        Aufruf neu zu parsen.
+
+        Statt ``for x in xs: server.dbExecute(sql, x)`` schreibt man also
+        ``stmt = server.prepare(sql)`` und dann ``for x in xs: stmt.execute(x)``.
+
+        :param sql: das SQL-Statement
+        :type sql: sql_utils.SqlStatement
+        :param raw: soll das SQL nicht vervollständigt werden?
+        :type raw: bool
+        :rtype: PreparedStatement
+        """
+        sqlC = str(sql) if raw else self.completeSQL(sql)
+        return PreparedStatement(self, sqlC)
 
     def isDBTableKnown(self, table: str) -> bool:
-        """Prüft, ob eine Tabelle im System bekannt ist"""
-        sql = "select count(*) from SYS.TABLES T where T.NAME=?"
-        c = self.dbQuerySingleValue(sql, table)
-        return (c > 0)
+        """Prüft, ob eine Tabelle im System bekannt ist. Beim ersten Aufruf
+           werden alle Tabellennamen mit einer einzigen Query geladen; danach
+           ist die Prüfung ein reiner Mengen-Lookup, siehe
+           :meth:`invalidateSchemaCache`."""
+        if self._knownTablesCache is None:
+            self._knownTablesCache = frozenset(
+                self.dbQueryAllToSet("select NAME from SYS.TABLES",
+                                     apply=lambda r: sql_utils.normaliseDBfield(r.NAME)))
+        return sql_utils.normaliseDBfield(table) in self._knownTablesCache
+
+    def invalidateSchemaCache(self) -> None:
+        """Leert die Caches der Schema-Methoden (:meth:`getTableFields`,
+           :meth:`getUniqueFieldsOfTable`, :meth:`isDBTableKnown`). Nötig
+           nach DDL-Änderungen, z.B. durch :meth:`updateDatabase`."""
+        self._tableFieldsCache.clear()
+        self._uniqueFieldsCache.clear()
+        self._knownTablesCache = None
 
     def getAppClient(self, package: str, name: str) -> Client:
         """Erzeugt einen zeep - Client für den APP-Server.
@@ -230,7 +593,7 @@ class APplusServer:
            """
         return self.server_conn.getWebClient(url)
 
-    def getTableFields(self, table: str, isComputed: Optional[bool] = None) -> Set[str]:
+    def getTableFields(self, table: str, isComputed: Optional[bool] = None) -> FrozenSet[str]:
         """
         Liefert die Namen aller Felder einer Tabelle.
 
@@ -239,32 +602,49 @@ class APplusServer:
         :return: Liste aller Feld-Namen
         :rtype: {str}
         """
-        sql = sql_utils.SqlStatementSelect("SYS.TABLES T")
-        join = sql.addInnerJoin("SYS.COLUMNS C")
-        join.on.addConditionFieldsEq("T.Object_ID", "C.Object_ID")
-        if not (isComputed is None):
-            join.on.addConditionFieldEq("c.is_computed", isComputed)
-        sql.addFields("C.NAME")
-
-        sql.where.addConditionFieldEq("t.name", sql_utils.SqlParam())
-        return sql_utils.normaliseDBfieldSet(self.dbQueryAll(sql, table, apply=lambda r: r.NAME))
+        cacheKey = (table, isComputed)
+        cached = self._tableFieldsCache.get(cacheKey)
+        if not (cached is None):
+            return cached
+
+        # das Statement unterscheidet sich nur im Parameter table; das
+        # vervollständigte SQL wird daher je isComputed-Wert gecached und
+        # danach per raw=True ohne erneuten SOAP-Roundtrip ausgeführt
+        sqlC = self._tableFieldsSQLCache.get(isComputed)
+        if sqlC is None:
+            sqlC = self.completeSQL(_getTableFieldsSQL(isComputed))
+            self._tableFieldsSQLCache[isComputed] = sqlC
+
+        # frozenset, damit Aufrufer den gecachten Eintrag nicht verändern können
+        res = frozenset(self.dbQueryAllToSet(
+            sqlC, table, raw=True, apply=lambda r: sql_utils.normaliseDBfield(r.NAME)))
+        self._tableFieldsCache[cacheKey] = res
+        return res
 
     def getUniqueFieldsOfTable(self, table: str) -> Dict[str, List[str]]:
         """
         Liefert alle Spalten einer Tabelle, die eindeutig sein müssen.
         Diese werden als Dictionary gruppiert nach Index-Namen geliefert.
         Jeder Eintrag enthält eine Liste von Feldern, die zusammen eindeutig sein
-        müssen.
+        müssen. Das Ergebnis wird gecached, siehe :meth:`invalidateSchemaCache`.
         """
-        conn = self.getDBConnection()
-        res = applus_db.getUniqueFieldsOfTable(conn, table)
-        self.releaseDBConnection(conn)
+        res = self._uniqueFieldsCache.get(table)
+        if res is None:
+            with self._acquireDBConnection() as conn:
+                res = applus_db.getUniqueFieldsOfTable(conn, table)
+            self._uniqueFieldsCache[table] = res
         return res
 
     def useXML(self, xml: str) -> Any:
         """Ruft ``p2core.xml.usexml`` auf. Wird meist durch ein ``UseXMLRow-Objekt`` aufgerufen."""
         return self.client_xml.service.useXML(xml)
 
+    def useXMLMany(self, xmls: Sequence[str]) -> List[Any]:
+        """Ruft ``p2core.xml.usexml`` für mehrere XML-Dokumente auf. Die
+           SOAP-Aufrufe laufen parallel im Thread-Pool, die Ergebnisse werden
+           in Eingabe-Reihenfolge geliefert."""
+        return list(self._soapPool.map(self.client_xml.service.useXML, xmls))
+
     def mkUseXMLRowInsert(self, table: str) -> applus_usexml.UseXmlRowInsert:
         """
         Erzeugt ein Objekt zum Einfügen eines neuen DB-Eintrags.
@@ -305,6 +685,40 @@ class APplusServer:
         """
         return self.client_nummer.service.nextNumber(obj)
 
+    def nextNumbers(self, obj: str, count: int) -> List[str]:
+        """
+        Erstellt mehrere neue Nummern für das Objekt. Die SOAP-Aufrufe laufen
+        parallel im Thread-Pool statt nacheinander.
+        """
+        return list(self._soapPool.map(self.client_nummer.service.nextNumber,
+                                       [obj] * count))
+
+    def _runSOAPJob(self, label: str, fn: Callable[[str], Any]) -> str:
+        """
+        Fasst das wiederkehrende Job-Muster zusammen: SOAP-Job anlegen, den
+        eigentlichen Aufruf mit der JobID ausführen und das Ergebnis abholen.
+        Liegt das Ergebnis direkt nach dem Aufruf noch nicht vor, wird mit
+        exponentiell wachsenden Pausen einige Male nachgefragt statt sofort
+        "FEHLER" zu melden.
+
+        :param label: die Bezeichnung des neuen Jobs
+        :type label: str
+        :param fn: der eigentliche Aufruf; bekommt die JobID übergeben
+        :return: das Ergebnis des Jobs oder "FEHLER"
+        :rtype: str
+        """
+        jobId = self.job.createSOAPJob(label)
+        fn(jobId)
+        res = self.job.getResultURLString(jobId)
+        for k in range(8):
+            if not (res is None):
+                return res
+            time.sleep(0.05 * (1.5 ** k))
+            res = self.job.getResultURLString(jobId)
+        if res is None:
+            res = "FEHLER"
+        return res
+
     def updateDatabase(self, file : str) -> str:
         """
         Führt eine DBAnpass-xml Datei aus.
@@ -313,10 +727,10 @@ class APplusServer:
         :return: Infos zur Ausführung
         :rtype: str
         """
-        jobId = self.job.createSOAPJob("run DBAnpass " + file);
-        self.client_adaptdb.service.updateDatabase(jobId, "de", file);
-        res = self.job.getResultURLString(jobId)
-        if res is None: res = "FEHLER";
+        res = self._runSOAPJob(
+            "run DBAnpass " + file,
+            lambda jobId: self.client_adaptdb.service.updateDatabase(jobId, "de", file))
+        self.invalidateSchemaCache()
         if (res == "Folgende Befehle konnten nicht ausgeführt werden:\n\n"):
             return ""
         else:
@@ -335,35 +749,32 @@ class APplusServer:
         :return: Infos zur Ausführung
         :rtype: str
         """
-        lbl="";
-        files=[];
-        for v in views:
-            files.append({"type" : 1, "name" : v})
-        for u in udfs:
-            files.append({"type" : 0, "name" : u})
+        files = [{"type": 1, "name": v} for v in views] + \
+                [{"type": 0, "name": u} for u in udfs]
 
-
-        jobId = self.job.createSOAPJob("importing UDFs and Views");
-        self.client_adaptdb.service.importUdfsAndViews(jobId, environment, False, json.dumps(files), "de");
-        res = self.job.getResultURLString(jobId)
-        if res is None: res = "FEHLER";
-        return res
+        return self._runSOAPJob(
+            "importing UDFs and Views",
+            lambda jobId: self.client_adaptdb.service.importUdfsAndViews(
+                jobId, environment, False, _dumpsJson(files), "de"))
 
 
     def makeWebLink(self, base: str, **kwargs: Any) -> str:
-        if not self.server_settings.webserver:
-            raise Exception("keine Webserver-BaseURL gesetzt")
-
-        url = str(self.server_settings.webserver) + base
-        firstArg = True
-        for arg, argv in kwargs.items():
-            if not (argv is None):
-                if firstArg:
-                    firstArg = False
-                    url += "?"
-                else:
-                    url += "&"
-                url += arg + "=" + urllib.parse.quote(str(argv))
+        url = self._webLinkPrefixCache.get(base)
+        if url is None:
+            if self._webserverBase is None:
+                # pro Fehlversuch eine frische Exception: ein geteiltes
+                # Objekt würde bei jedem raise seinen __traceback__
+                # verlängern und Frames dauerhaft am Leben halten
+                raise NoWebBaseURLError("keine Webserver-BaseURL gesetzt")
+            url = self._webserverBase + base
+            self._webLinkPrefixCache[base] = url
+
+        # urlencode baut den Query-String in einem Stück zusammen, statt
+        # pro Parameter neue Strings zu erzeugen; quote statt quote_plus,
+        # damit die Kodierung der bisherigen entspricht
+        params = {arg: str(argv) for arg, argv in kwargs.items() if not (argv is None)}
+        if params:
+            url += "?" + urllib.parse.urlencode(params, quote_via=urllib.parse.quote)
         return url
 
     def makeWebLinkWauftragPos(self, **kwargs: Any) -> str:
@@ -384,6 +795,49 @@ class APplusServer:
     def makeWebLinkWarenaugang(self, **kwargs: Any) -> str:
         return self.makeWebLink("sales/warenausgangRec.aspx", **kwargs)
 
+class PreparedStatement:
+    """
+    Ein per :meth:`APplusServer.prepare` vorbereitetes SQL-Statement.
+    Hält den bereits vervollständigten SQL-Text, so dass wiederholte
+    Ausführungen weder SOAP-Aufruf noch erneutes Stringifizieren brauchen.
+
+    :param server: die Verbindung zum Server
+    :type server: APplusServer
+    :param sqlC: das bereits vervollständigte SQL
+    :type sqlC: str
+    """
+
+    def __init__(self, server: APplusServer, sqlC: str) -> None:
+        self.server = server
+        self.sql = sqlC
+        """der vervollständigte SQL-Text"""
+
+    def execute(self, *args: Any) -> Any:
+        """führt das Statement mit den übergebenen Parametern aus,
+           siehe :meth:`APplusServer.dbExecute`"""
+        with self.server._acquireDBConnection() as conn:
+            return applus_db.rawExecute(conn, self.sql, *args)
+
+    def executeMany(self, argsList: Sequence[Sequence[Any]], fast: bool = True) -> None:
+        """führt das Statement einmal pro Parametersatz aus,
+           siehe :meth:`APplusServer.dbExecuteMany`"""
+        with self.server._acquireDBConnection() as conn:
+            applus_db.rawExecuteMany(conn, self.sql, argsList, fast=fast)
+
+    def queryAll(self, *args: Any,
+                 apply: Optional[Callable[[pyodbc.Row], Any]] = None) -> Sequence[Any]:
+        """führt die Query mit den übergebenen Parametern aus und liefert
+           alle Zeilen, siehe :meth:`APplusServer.dbQueryAll`"""
+        with self.server._acquireDBConnection() as conn:
+            return applus_db.rawQueryAll(conn, self.sql, *args, apply=apply)
+
+    def querySingleValue(self, *args: Any) -> Any:
+        """führt die Query aus und liefert den einzelnen Wert oder None,
+           siehe :meth:`APplusServer.dbQuerySingleValue`"""
+        with self.server._acquireDBConnection() as conn:
+            return applus_db.rawQuerySingleValue(conn, self.sql, *args)
+
+
 def applusFromConfigDict(yamlDict: Dict[str, Any], user: Optional[str] = None, env: Optional[str] = None) -> APplusServer:
     """Läd Einstellungen aus einer Config und erzeugt daraus ein APplus-Objekt"""
     if user is None or user == '':
@@ -407,19 +861,37 @@ def applusFromConfigDict(yamlDict: Dict[str, Any], user: Optional[str] = None, e
     return APplusServer(dbparams, server_settings)
 
 
+@functools.lru_cache(maxsize=8)
+def _loadConfigYamlCached(yamlfile: pathlib.Path, mtime_ns: int) -> Dict[str, Any]:
+    """Hilfsfunktion, die eine Config-Datei parst und das Ergebnis cached.
+       Der Parameter mtime_ns dient nur als Cache-Key, so dass geänderte
+       Dateien neu geladen werden."""
+    with open(yamlfile, "r") as stream:
+        return yaml.load(stream, Loader=SafeYamlLoader)
+
+
 def applusFromConfigFile(yamlfile: 'FileDescriptorOrPath',
                          user: Optional[str] = None, env: Optional[str] = None) -> APplusServer:
-    """Läd Einstellungen aus einer Config-Datei und erzeugt daraus ein APplus-Objekt"""
+    """Läd Einstellungen aus einer Config-Datei und erzeugt daraus ein APplus-Objekt.
+       Die geparsten Config-Dateien werden gecached, so dass wiederholte Aufrufe
+       mit der gleichen Datei die Datei nicht erneut lesen und parsen."""
     yamlDict = {}
-    with open(yamlfile, "r") as stream:
-        yamlDict = yaml.safe_load(stream)
+    try:
+        path = pathlib.Path(yamlfile).resolve()  # type: ignore[arg-type]
+        mtime_ns = path.stat().st_mtime_ns
+    except (TypeError, OSError):
+        # kein Pfad (z.B. File-Descriptor) oder Datei nicht lesbar: nicht cachen
+        with open(yamlfile, "r") as stream:
+            yamlDict = yaml.load(stream, Loader=SafeYamlLoader)
+    else:
+        yamlDict = copy.deepcopy(_loadConfigYamlCached(path, mtime_ns))
 
     return applusFromConfigDict(yamlDict, user=user, env=env)
 
 
 def applusFromConfig(yamlString: str, user: Optional[str] = None, env: Optional[str] = None) -> APplusServer:
     """Läd Einstellungen aus einer Config-Datei und erzeugt daraus ein APplus-Objekt"""
-    yamlDict = yaml.safe_load(yamlString)
+    yamlDict = yaml.load(yamlString, Loader=SafeYamlLoader)
     return applusFromConfigDict(yamlDict, user=user, env=env)
 
 
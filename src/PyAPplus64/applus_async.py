@@ -0,0 +1,91 @@
+# Copyright (c) 2023 Thomas Tuerk (kontakt@thomas-tuerk.de)
+#
+# This file is part of PyAPplus64 (see https://www.thomas-tuerk.de/de/pyapplus64).
+#
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+
+import asyncio
+from typing import TYPE_CHECKING, Any, Optional, List, Sequence
+import pyodbc  # type: ignore
+from . import sql_utils
+
+if TYPE_CHECKING:
+    from .applus import APplusServer
+
+
+class APplusServerAsync:
+    """
+    Asynchrone Sicht auf einen :class:`~PyAPplus64.applus.APplusServer`.
+
+    Die dbQuery*- und SOAP-Methoden von APplusServer blockieren; in
+    asyncio-Anwendungen (z.B. einer Weboberfläche) sollen aber mehrere
+    Abfragen gleichzeitig laufen können. Die Methoden dieser Klasse führen
+    den jeweiligen blockierenden Aufruf per :func:`asyncio.to_thread` in
+    einem Worker-Thread aus, so dass sie mit ``asyncio.gather``
+    kombinierbar sind. Jeder gleichzeitig laufende Aufruf holt sich dabei
+    über den threadsicheren Verbindungspool von APplusServer seine eigene
+    DB-Verbindung; Verbindungen werden also nie von mehreren Tasks
+    gleichzeitig benutzt.
+
+    :param server: die Verbindung zum Server
+    :type server: APplusServer
+    """
+
+    def __init__(self, server: 'APplusServer') -> None:
+        self.server = server
+
+    async def acompleteSQL(self, sql: sql_utils.SqlStatement, raw: bool = False) -> str:
+        """asynchrone Variante von :meth:`~PyAPplus64.applus.APplusServer.completeSQL`"""
+        return await asyncio.to_thread(self.server.completeSQL, sql, raw=raw)
+
+    async def adbQueryAll(self, sql: sql_utils.SqlStatement, *args: Any,
+                          **kwargs: Any) -> Sequence[Any]:
+        """asynchrone Variante von :meth:`~PyAPplus64.applus.APplusServer.dbQueryAll`"""
+        return await asyncio.to_thread(self.server.dbQueryAll, sql, *args, **kwargs)
+
+    async def adbQuerySingleRow(self, sql: sql_utils.SqlStatement, *args: Any,
+                                **kwargs: Any) -> Optional[pyodbc.Row]:
+        """asynchrone Variante von :meth:`~PyAPplus64.applus.APplusServer.dbQuerySingleRow`"""
+        return await asyncio.to_thread(self.server.dbQuerySingleRow, sql, *args, **kwargs)
+
+    async def adbQuerySingleValue(self, sql: sql_utils.SqlStatement, *args: Any,
+                                  **kwargs: Any) -> Any:
+        """asynchrone Variante von :meth:`~PyAPplus64.applus.APplusServer.dbQuerySingleValue`"""
+        return await asyncio.to_thread(self.server.dbQuerySingleValue, sql, *args, **kwargs)
+
+    async def adbQuerySingleValues(self, sql: sql_utils.SqlStatement, *args: Any,
+                                   **kwargs: Any) -> List[Any]:
+        """asynchrone Variante von :meth:`~PyAPplus64.applus.APplusServer.dbQuerySingleValues`"""
+        return await asyncio.to_thread(self.server.dbQuerySingleValues, sql, *args, **kwargs)
+
+    async def adbExecute(self, sql: sql_utils.SqlStatement, *args: Any,
+                         **kwargs: Any) -> Any:
+        """asynchrone Variante von :meth:`~PyAPplus64.applus.APplusServer.dbExecute`"""
+        return await asyncio.to_thread(self.server.dbExecute, sql, *args, **kwargs)
+
+    async def auseXML(self, xml: str) -> Any:
+        """asynchrone Variante von :meth:`~PyAPplus64.applus.APplusServer.useXML`"""
+        return await asyncio.to_thread(self.server.useXML, xml)
+
+    # Job-Steuerung: erlaubt einem Supervisor-Script, viele Jobs per
+    # asyncio.gather gleichzeitig zu aktualisieren statt einen
+    # SOAP-Roundtrip nach dem anderen zu warten
+
+    async def asetJobInfo(self, jobId: str, info: str) -> bool:
+        """asynchrone Variante von :meth:`~PyAPplus64.applus_job.APplusJob.setInfo`"""
+        return await asyncio.to_thread(self.server.job.setInfo, jobId, info)
+
+    async def asetJobPosition(self, jobId: str, pos: int, max: int) -> bool:
+        """asynchrone Variante von :meth:`~PyAPplus64.applus_job.APplusJob.setPosition`"""
+        return await asyncio.to_thread(self.server.job.setPosition, jobId, pos, max)
+
+    async def agetJobStatus(self, jobId: str) -> str:
+        """asynchrone Variante von :meth:`~PyAPplus64.applus_job.APplusJob.getStatus`"""
+        return await asyncio.to_thread(self.server.job.getStatus, jobId)
+
+    async def agetXMLDefinitionObj(self, obj: str, mandant: str = "") -> Any:
+        """asynchrone Variante von
+           :meth:`~PyAPplus64.applus_scripttool.APplusScriptTool.getXMLDefinitionObj`"""
+        return await asyncio.to_thread(self.server.scripttool.getXMLDefinitionObj, obj, mandant)
@@ -6,53 +6,100 @@
 # license that can be found in the LICENSE file or at
 # https://opensource.org/licenses/MIT.
 
+import collections
 import pyodbc  # type: ignore
 import logging
 from .sql_utils import SqlStatement
 from . import sql_utils
-from typing import List, Dict, Set, Any, Optional, Callable, Sequence
+from typing import List, Dict, FrozenSet, Set, Any, Iterator, Optional, Callable, Sequence
 
 
 logger = logging.getLogger(__name__)
 
+# ODBC-Connection-Pooling im Treiber-Manager aktivieren. Muss vor dem ersten
+# pyodbc.connect gesetzt werden. Damit wird der Verbindungsaufbau (TLS + Login)
+# über mehrere kurzlebige Verbindungen hinweg amortisiert.
+pyodbc.pooling = True
+
 
 class APplusDBSettings:
     """
     Einstellungen, mit welcher DB sich verbunden werden soll.
     """
 
-    def __init__(self, server: str, database: str, user: str, password: str):
+    def __init__(self, server: str, database: str, user: str, password: str,
+                 driver: str = "ODBC Driver 18 for SQL Server"):
         self.server = server
         self.database = database
         self.user = user
         self.password = password
+        self.driver = driver
+        """der zu verwendende ODBC-Treiber; der veraltete
+           "SQL Server Native Client 11.0" kann bei Bedarf weiterhin
+           explizit angegeben werden"""
 
     def getConnectionString(self) -> str:
         """Liefert den ODBC Connection-String für die Verbindung.
         :return: den Connection-String
         """
-        return ("Driver={SQL Server Native Client 11.0};"
-                "Server="+self.server+";"
-                "Database="+self.database+";"
-                "UID="+self.user+";"
-                "PWD="+self.password + ";")
-
-    def connect(self) -> pyodbc.Connection:
+        return ";".join([
+            "Driver={" + self.driver + "}",
+            "Server=" + self.server,
+            "Database=" + self.database,
+            "UID=" + self.user,
+            "PWD=" + self.password,
+            "Encrypt=yes",
+            "TrustServerCertificate=yes",
+            "MARS_Connection=Yes"]) + ";"
+
+    def connect(self, autocommit: bool = False) -> pyodbc.Connection:
         """Stellt eine neue Verbindung her und liefert diese zurück.
+
+        :param autocommit: soll jedes Statement sofort committet werden?
+           Für kurzlebige Einzel-Queries spart das die implizite
+           Transaktionsverwaltung des Treibers pro Statement.
         """
-        return pyodbc.connect(self.getConnectionString())
+        cnxn = pyodbc.connect(self.getConnectionString(), autocommit=autocommit)
+        # Kodierungen explizit setzen, damit der Treiber Zellen nicht
+        # mehrfach umkodieren muss; SQL Server liefert WCHAR als UTF-16LE
+        cnxn.setdecoding(pyodbc.SQL_CHAR, encoding='utf-8')
+        cnxn.setdecoding(pyodbc.SQL_WCHAR, encoding='utf-16le')
+        cnxn.setencoding(encoding='utf-8')
+        return cnxn
+
+
+def row_to_dict(row: pyodbc.Row, names: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """Konvertiert eine Zeile in ein Dictionary.
+
+    :param names: optional die bereits extrahierten Spaltennamen; wenn mehrere
+       Zeilen desselben Cursors konvertiert werden, müssen die Namen so nur
+       einmal aus cursor_description gelesen werden (siehe :func:`rows_to_dicts`)
+    """
+    if names is None:
+        names = [t[0] for t in row.cursor_description]
+    return dict(zip(names, row))
 
 
-def row_to_dict(row: pyodbc.Row) -> Dict[str, Any]:
-    """Konvertiert eine Zeile in ein Dictionary"""
-    return dict(zip([t[0] for t in row.cursor_description], row))
+def rows_to_dicts(rows: Sequence[pyodbc.Row]) -> List[Dict[str, Any]]:
+    """Konvertiert mehrere Zeilen desselben Cursors in Dictionaries.
+       Die Spaltennamen werden dabei nur einmal aus cursor_description
+       extrahiert statt pro Zeile."""
+    if not rows:
+        return []
+    names = [t[0] for t in rows[0].cursor_description]
+    return [dict(zip(names, r)) for r in rows]
 
 
 def _logSQLWithArgs(sql: SqlStatement, *args: Any) -> None:
+    # str(sql) kann bei komplexen SqlStatements teuer sein und args können
+    # große Werte enthalten; daher nur formatieren, wenn DEBUG wirklich
+    # ausgegeben wird, und die Formatierung lazy dem Logging überlassen
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
     if args:
-        logger.debug("executing '{}' with args {}".format(str(sql), str(args)))
+        logger.debug("executing '%s' with args %r", sql, args)
     else:
-        logger.debug("executing '{}'".format(str(sql)))
+        logger.debug("executing '%s'", sql)
 
 
 def rawQueryAll(
@@ -80,15 +127,88 @@ def rawQueryAll(
             return res
 
 
+def rawQueryAllToSet(cnxn: pyodbc.Connection, sql: SqlStatement, *args: Any,
+                     apply: Callable[[pyodbc.Row], Any]) -> Set[Any]:
+    """
+    Führt eine SQL Query direkt aus und sammelt die per apply projizierten
+    Zeilen direkt vom Cursor in eine Menge, ohne den Umweg über eine
+    Zwischenliste aller Zeilen.
+    """
+    _logSQLWithArgs(sql, *args)
+    with cnxn.cursor() as cursor:
+        cursor.execute(str(sql), *args)
+        return {apply(r) for r in cursor}
+
+
+def rawQueryFirstColumn(cnxn: pyodbc.Connection, sql: SqlStatement, *args: Any) -> List[Any]:
+    """
+    Führt eine SQL Query direkt aus und liefert die erste Spalte aller Zeilen
+    als Liste. Schneller Spezialfall von :func:`rawQueryAll` mit
+    ``apply=lambda r: r[0]``: die Projektion läuft als List-Comprehension ohne
+    Funktionsaufruf pro Zeile.
+    """
+    _logSQLWithArgs(sql, *args)
+    with cnxn.cursor() as cursor:
+        cursor.execute(str(sql), *args)
+        # None-Werte werden wie bei rawQueryAll mit apply unterdrückt
+        return [r[0] for r in cursor.fetchall() if not (r[0] is None)]
+
+
+def rawQueryIter(cnxn: pyodbc.Connection, sql: SqlStatement, *args: Any,
+                 arraysize: int = 1000,
+                 apply: Optional[Callable[[pyodbc.Row], Any]] = None) -> Iterator[Any]:
+    """
+    Führt eine SQL Query direkt aus und liefert die Zeilen als Generator.
+    Es werden jeweils arraysize Zeilen auf einmal geholt, so dass nie alle
+    Zeilen gleichzeitig im Speicher gehalten werden. Wenn apply gesetzt ist,
+    wird wie bei :func:`rawQueryAll` die Funktion auf jeder Zeile ausgeführt
+    und nur Ergebnisse geliefert, die nicht None sind.
+    """
+    _logSQLWithArgs(sql, *args)
+    with cnxn.cursor() as cursor:
+        cursor.arraysize = arraysize
+        cursor.execute(str(sql), *args)
+        while True:
+            rows = cursor.fetchmany(arraysize)
+            if not rows:
+                break
+            if apply is None:
+                yield from rows
+            else:
+                for r in rows:
+                    rr = apply(r)
+                    if not (rr is None):
+                        yield rr
+
+
 def rawQuery(cnxn: pyodbc.Connection, sql: sql_utils.SqlStatement, f: Callable[[pyodbc.Row], None], *args: Any) -> None:
     """Führt eine SQL Query direkt aus und führt für jede Zeile die übergeben Funktion aus."""
     _logSQLWithArgs(sql, *args)
     with cnxn.cursor() as cursor:
+        # Hinweis an den Treiber, Zeilen in größeren Blöcken zu holen
+        cursor.arraysize = 1000
         cursor.execute(str(sql), *args)
         for row in cursor:
             f(row)
 
 
+def rawQueryBatched(cnxn: pyodbc.Connection, sql: sql_utils.SqlStatement,
+                    fbatch: Callable[[Sequence[pyodbc.Row]], None], *args: Any,
+                    arraysize: int = 1000) -> None:
+    """Führt eine SQL Query direkt aus und übergibt die Zeilen blockweise
+       (jeweils bis zu arraysize Stück) an die Funktion fbatch. Gegenüber
+       :func:`rawQuery` entfällt so der Callback-Aufruf pro Zeile."""
+    _logSQLWithArgs(sql, *args)
+    with cnxn.cursor() as cursor:
+        cursor.arraysize = arraysize
+        cursor.execute(str(sql), *args)
+        while True:
+            rows = cursor.fetchmany(arraysize)
+            if not rows:
+                break
+            fbatch(rows)
+
+
 def rawQuerySingleRow(cnxn: pyodbc.Connection, sql: SqlStatement, *args: Any) -> Optional[pyodbc.Row]:
     """Führt eine SQL Query direkt aus, die maximal eine Zeile zurückliefern soll. Diese Zeile wird geliefert."""
     _logSQLWithArgs(sql, *args)
@@ -114,6 +234,22 @@ def rawExecute(cnxn: pyodbc.Connection, sql: SqlStatement, *args: Any) -> Any:
     with cnxn.cursor() as cursor:
         return cursor.execute(str(sql), *args)
 
+
+def rawExecuteMany(cnxn: pyodbc.Connection, sql: SqlStatement,
+                   argsList: Sequence[Sequence[Any]], fast: bool = True) -> None:
+    """Führt ein SQL Statement (z.B. insert oder update) einmal pro
+       Parametersatz aus. executemany überträgt alle Parametersätze in
+       einem Rutsch an den Treiber statt pro Satz einen Roundtrip zu machen.
+
+       fast_executemany setzt einen neueren ODBC-Treiber voraus (Microsoft
+       ODBC Driver 17+); bei Problemen mit älteren Treibern kann fast=False
+       übergeben werden, dann bindet der Treiber zeilenweise."""
+    _logSQLWithArgs(sql, argsList)
+    with cnxn.cursor() as cursor:
+        if fast:
+            cursor.fast_executemany = True
+        cursor.executemany(str(sql), argsList)
+
 def getUniqueFieldsOfTable(cnxn: pyodbc.Connection, table: str) -> Dict[str, List[str]]:
     """
     Liefert alle Spalten einer Tabelle, die eindeutig sein müssen.
@@ -131,14 +267,18 @@ def getUniqueFieldsOfTable(cnxn: pyodbc.Connection, table: str) -> Dict[str, Lis
     sql.addFields("i.name AS INDEX_NAME", "COL_NAME(ic.OBJECT_ID,ic.column_id) AS COL")
     _logSQLWithArgs(sql)
 
-    indices: Dict[str, List[str]] = {}
+    # defaultdict spart das get/append/zurückschreiben-Muster pro Zeile
+    indices: Dict[str, List[str]] = collections.defaultdict(list)
     with cnxn.cursor() as cursor:
         cursor.execute(str(sql))
         for row in cursor:
-            cols = indices.get(row.INDEX_NAME, [])
-            cols.append(sql_utils.normaliseDBfield(row.COL))
-            indices[row.INDEX_NAME] = cols
-    return indices
+            indices[row.INDEX_NAME].append(sql_utils.normaliseDBfield(row.COL))
+    return dict(indices)
+
+
+_EMPTY_IDS: FrozenSet[int] = frozenset()
+"""leere Menge für Cache-Misses in :meth:`DBTableIDs.getTable`; spart die
+   Allokation einer neuen leeren Menge pro Fehlversuch"""
 
 
 class DBTableIDs():
@@ -155,23 +295,25 @@ class DBTableIDs():
         :type table: str
         :param id: die ID
         """
-        table = table.upper()
-        if not (table in self.data):
-            self.data[table] = set(ids)
+        # nur ein Dictionary-Zugriff statt Test plus Zugriff
+        key = table.upper()
+        s = self.data.get(key)
+        if s is None:
+            self.data[key] = set(ids)
         else:
-            self.data[table].update(ids)
+            s.update(ids)
 
     def getTable(self, table: str) -> Set[int]:
         """
         Liefert die Menge der IDs für eine bestimmte Tabelle.
+        Das Ergebnis darf nicht verändert werden.
 
         :param table: die Tabelle
         :type table: str
         :return: die IDs
         """
 
-        table = table.upper()
-        return self.data.get(table, set())
+        return self.data.get(table.upper(), _EMPTY_IDS)  # type: ignore[arg-type]
 
     def __str__(self) -> str:
         return str(self.data)
@@ -13,6 +13,9 @@ import uuid
 if TYPE_CHECKING:
     from .applus import APplusServer
 
+_RETSTRING_PREFIX = "retstring://"
+_RETSTRING_PLEN = len(_RETSTRING_PREFIX)
+
 
 class APplusJob:
     """
@@ -88,8 +91,8 @@ class APplusJob:
         if res is None:
             return None
 
-        if res.startswith("retstring://"):
-            return res[12:]
+        if res.startswith(_RETSTRING_PREFIX):
+            return res[_RETSTRING_PLEN:]
         return None
 
     def setPtURL(self, jobId: str, pturl: str) -> None:
@@ -201,3 +204,33 @@ class APplusJob:
         :type resurl: str
         """
         return self.client.service.finish(jobId, status, resurl)
+
+    def finishWithResult(self, jobId: str, status: int, resurl: str,
+                         result: Optional[str] = None, info: Optional[str] = None) -> bool:
+        """
+        Beendet den Job und setzt dabei Result und Info. Die voneinander
+        unabhängigen setResult/setInfo-Aufrufe laufen parallel über die
+        geteilte Keep-Alive-Verbindung, erst danach wird finish gerufen;
+        gegenüber drei nacheinander abgewarteten Roundtrips spart das beim
+        Abschluss vieler Jobs deutlich Wartezeit.
+
+        :param jobId: die ID des Jobs
+        :type jobId: str
+        :param status: der Status 2 (OK), 3 (Fehler)
+        :type status: int
+        :param resurl: die neue resurl des Jobs
+        :type resurl: str
+        :param result: das zu setzende Result, falls nicht None
+        :type result: Optional[str]
+        :param info: die zu setzende Info, falls nicht None
+        :type info: Optional[str]
+        """
+        calls = []
+        if not (result is None):
+            calls.append(lambda: self.setResult(jobId, result))
+        if not (info is None):
+            calls.append(lambda: self.setInfo(jobId, info))
+        if calls:
+            # map konsumieren, damit Fehler der Teilaufrufe nicht verloren gehen
+            list(self.server._soapPool.map(lambda f: f(), calls))
+        return self.finish(jobId, status, resurl)
@@ -6,21 +6,58 @@
 # license that can be found in the LICENSE file or at
 # https://opensource.org/licenses/MIT.
 
-from .applus import APplusServer
 from . import sql_utils
+import functools
 import lxml.etree as ET  # type: ignore
-from typing import Optional, Tuple, Set
+import threading
+from typing import TYPE_CHECKING, Optional, Tuple, Set
 from zeep import Client
 import pathlib
 
+if TYPE_CHECKING:
+    from .applus import APplusServer
+
+_parserStore = threading.local()
+
+
+def _getXMLParser() -> ET.XMLParser:
+    """wiederverwendeter lxml-Parser für die vielen kleinen XML-Dokumente
+       vom AppServer; erspart das Anlegen eines neuen Parser-Kontexts pro
+       Aufruf. lxml-Parser sind nicht threadsicher, daher gibt es pro
+       Thread einen eigenen (parallele Aufrufe über _soapPool bzw.
+       applus_async sind ausdrücklich vorgesehen)."""
+    p = getattr(_parserStore, "parser", None)
+    if p is None:
+        p = ET.XMLParser(remove_blank_text=True, resolve_entities=False, collect_ids=False)
+        _parserStore.parser = p
+    return p
+
+# vorkompilierte XPath-Ausdrücke für getDuplicate; das Kompilieren des
+# Pfads passiert so nur einmal pro Prozess statt pro Dokument
+_XP_DUPLICATE = ET.XPath("duplicate")
+_XP_DUP_PROPS = ET.XPath("duplicate/r:property", namespaces={"r": "ref"})
+
+_normDBfield = functools.lru_cache(maxsize=4096)(sql_utils.normaliseDBfield)
+"""memoisierte Normalisierung; dieselben Property-Referenzen (z.B.
+   "artikel") tauchen in vielen Dokumenten auf und werden so nur einmal
+   normalisiert"""
+
 
 class XMLDefinition:
     """Repräsentation eines XML-Dokuments"""
 
+    # feste Attributmenge: ohne __dict__ sind die vielen Instanzen beim
+    # Iterieren über Objekte/Mandanten kleiner und Attributzugriffe schneller
+    __slots__ = ("root", "_duplicateCache")
+
     def __init__(self, root: ET.Element) -> None:
         self.root: ET.Element = root
         """das Root-Element, repräsentiert "object" aus Datei."""
 
+        self._duplicateCache: Optional[Tuple[Set[str], bool]] = None
+        """gecachtes Ergebnis von :meth:`getDuplicate`; das Dokument
+           ändert sich nach dem Parsen nicht mehr"""
+
     def __str__(self) -> str:
         return ET.tostring(self.root, encoding="unicode")
 
@@ -31,21 +68,29 @@ class XMLDefinition:
         :return: Tuple aus allen Properties und ob dies aus- (True) oder ein-(False) zuschließen sind.
         :rtype: Tuple[Set[str], bool]
         """
+        if not (self._duplicateCache is None):
+            return self._duplicateCache
+
         res: Set[str] = set()
         excl = True
-        dupl = self.root.find("duplicate")
-        if (dupl is None):
-            return (res, excl)
-
-        exclS = dupl.get("type", default="exclude")
-        excl = exclS.casefold() == "exclude"
-
-        for e in dupl.findall("{ref}property"):
+        dupls = _XP_DUPLICATE(self.root)
+        if not dupls:
+            self._duplicateCache = (res, excl)
+            return self._duplicateCache
+
+        # im häufigen Fall ohne type-Attribut entfallen Default-String
+        # und Vergleich komplett; die Attributwerte sind ASCII-Token,
+        # lower reicht und ist deutlich billiger als casefold
+        exclS = dupls[0].attrib.get("type")
+        excl = True if exclS is None else (exclS.lower() == "exclude")
+
+        for e in _XP_DUP_PROPS(self.root):
             v = e.get("ref")
             if not (v is None):
-                res.add(sql_utils.normaliseDBfield(str(v)))
+                res.add(_normDBfield(str(v)))
 
-        return (res, excl)
+        self._duplicateCache = (res, excl)
+        return self._duplicateCache
 
 
 class APplusScriptTool:
@@ -57,7 +102,7 @@ class APplusScriptTool:
 
     """
 
-    def __init__(self, server: APplusServer) -> None:
+    def __init__(self, server: 'APplusServer') -> None:
         self.server = server
         self._client = None
 
@@ -132,7 +177,12 @@ class APplusScriptTool:
         :return: das gefundene und geparste XML-Dokument
         :rtype: ET.Element
         """
-        return ET.fromstring(self.getXMLDefinitionString(obj, mandant=mandant))
+        # Der AppServer liefert die Definition als xsd:string im
+        # SOAP-Envelope; zeep muss den String also ohnehin decodieren, ein
+        # direktes Übernehmen des Element-Teilbaums aus der Antwort ist
+        # nicht möglich. Als Bytes übergeben, damit lxml das interne
+        # Umkodieren spart.
+        return ET.fromstring(self.getXMLDefinitionString(obj, mandant=mandant).encode("utf-8"), _getXMLParser())
 
     def getXMLDefinitionObj(self, obj: str, mandant: str = "") -> Optional[XMLDefinition]:
         """
@@ -147,18 +197,18 @@ class APplusScriptTool:
         :return: das gefundene und geparste XML-Dokument
         :rtype: Optional[XMLDefinition]
         """
+        # fromstring + find: gesucht sind ausdrücklich die direkten Kinder
+        # "md5" und "object" des Top-Knotens; ein tag-gefiltertes iterparse
+        # würde auch geschachtelte Knoten gleichen Namens treffen
         e = self.getXMLDefinition(obj, mandant=mandant)
         if e is None:
             return None
-
         if e.find("md5") is None:
             return None
-
         o = e.find("object")
         if o is None:
             return None
-        else:
-            return XMLDefinition(o)
+        return XMLDefinition(o)
 
     def getMandant(self) -> str:
         """
@@ -188,7 +238,7 @@ class APplusScriptTool:
         :return: das gefundene und geparste XML-Dokument
         :rtype: ET.Element
         """
-        return ET.fromstring(self.getServerInfoString())
+        return ET.fromstring(self.getServerInfoString().encode("utf-8"), _getXMLParser())
 
     def getAllEnvironments(self) -> [str]:
         """
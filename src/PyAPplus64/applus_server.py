@@ -7,10 +7,13 @@
 # https://opensource.org/licenses/MIT.
 
 from requests import Session  # type: ignore
+from requests.adapters import HTTPAdapter  # type: ignore
 from requests.auth import HTTPBasicAuth  # type: ignore # or HTTPDigestAuth, or OAuth1, etc.
-from zeep import Client
+from zeep import Client, Settings
 from zeep.transports import Transport
 from zeep.cache import SqliteCache
+import functools
+import pathlib
 from typing import Optional, Dict
 
 try:
@@ -19,6 +22,32 @@ try:
 except:
     auth_negotiate_present = False
 
+_zeepClientCache: Dict[str, Client] = {}
+"""Modulweiter Cache für zeep-Clients. Das Parsen der WSDL dominiert die
+   Startzeit; Clients werden daher über alle APplusServerConnection-Instanzen
+   hinweg wiederverwendet, sofern URL und Nutzer übereinstimmen.
+
+   Über Prozessgrenzen hinweg persistiert nur die WSDL selbst (siehe
+   _soapCache); die fertig geparsten Client-Objekte lassen sich nicht
+   sinnvoll auf Platte legen, da sie Sessions, Sockets und Locks halten
+   und damit nicht picklebar sind."""
+
+# gemeinsamer Platten-Cache für WSDL-Antworten: neue Prozesse laden die
+# WSDL einen Tag lang nicht erneut herunter, nur das Parsen fällt an.
+# Der Default-Pfad von SqliteCache liegt im Temp-Verzeichnis und damit
+# potentiell kurzlebig; daher ein fester Pfad im Nutzer-Cache-Verzeichnis.
+try:
+    _soapCachePath = pathlib.Path("~/.cache/pyapplus64/wsdl.db").expanduser()
+    _soapCachePath.parent.mkdir(parents=True, exist_ok=True)
+    _soapCache = SqliteCache(path=str(_soapCachePath), timeout=86400)
+except OSError:
+    _soapCache = SqliteCache(timeout=86400)
+
+_zeepSettings = Settings(strict=False, xml_huge_tree=True)
+"""Einstellungen für alle zeep-Clients: die WSDLs des APplus-Servers sind
+   bekannt und korrekt, die strikte Validierung beim Parsen kann daher
+   entfallen"""
+
 class APplusServerSettings:
     """
     Einstellungen, mit welchem APplus App- and Web-Server sich verbunden werden soll.
@@ -34,11 +63,19 @@ class APplusServerSettings:
         self.webserverUser = webserverUser
         self.webserverUserDomain = webserverUserDomain
         self.webserverPassword = webserverPassword
-        try:
-            if not (self.webserver[-1] == "/"):
-                self.webserver = self.webserver + "/"
-        except:
-            pass
+        # expliziter Check statt try/except: kein Exception-Aufbau für den
+        # normalen Fall, dass kein Webserver konfiguriert ist
+        if self.webserver and not self.webserver.endswith("/"):
+            self.webserver = self.webserver + "/"
+
+    @functools.cached_property
+    def userEnv(self) -> str:
+        """Nutzer samt Umgebung ("user" oder "user|env"); wird nur einmal
+           zusammengesetzt, auch wenn mehrere Verbindungen mit denselben
+           Einstellungen erzeugt werden"""
+        if self.env:
+            return self.user + "|" + self.env
+        return self.user
 
 
 class APplusServerConnection:
@@ -48,29 +85,46 @@ class APplusServerConnection:
     :type settings: APplusAppServerSettings
     """
     def __init__(self, settings: APplusServerSettings) -> None:
-        userEnv = settings.user
-        if (settings.env):
-            userEnv += "|" + settings.env
+        userEnv = settings.userEnv
 
+        # eine Session für alle App-Clients: Keep-Alive-Verbindungen werden
+        # über die verschiedenen SOAP-Schnittstellen hinweg wiederverwendet,
+        # so dass nicht jeder Aufruf TCP- und TLS-Handshake neu bezahlt
         sessionApp = Session()
         sessionApp.auth = HTTPBasicAuth(userEnv, "")
-
-        self.transportApp = Transport(cache=SqliteCache(), session=sessionApp)
+        # mehrere zeep-Clients teilen sich diese Session; der Pool muss
+        # daher größer sein als der requests-Default von 10, damit
+        # parallele SOAP-Aufrufe keine Keep-Alive-Verbindungen verwerfen
+        adapterApp = HTTPAdapter(pool_connections=32, pool_maxsize=64, max_retries=3)
+        sessionApp.mount("http://", adapterApp)
+        sessionApp.mount("https://", adapterApp)
+
+        # die WSDL-Antworten landen im gemeinsamen Platten-Cache, so dass
+        # auch neue Prozesse sie nicht erneut herunterladen müssen
+        self.transportApp = Transport(cache=_soapCache, session=sessionApp)
         # self.transportApp = Transport(session=sessionApp)
 
         if auth_negotiate_present:
             sessionWeb = Session()
             sessionWeb.auth = HttpNegotiateAuth(username=settings.webserverUser, password=settings.webserverPassword, domain=settings.webserverUserDomain)
+            adapterWeb = HTTPAdapter(pool_connections=32, pool_maxsize=64, max_retries=3)
+            sessionWeb.mount("http://", adapterWeb)
+            sessionWeb.mount("https://", adapterWeb)
 
-            self.transportWeb = Transport(cache=SqliteCache(), session=sessionWeb)
+            self.transportWeb = Transport(cache=_soapCache, session=sessionWeb)
             # self.transportWeb = Transport(session=sessionWeb)
         else:
             self.transportWeb = self.transportApp   # führt vermutlich zu Authorization-Fehlern, diese sind aber zumindest hilfreicher als NULL-Pointer Exceptions
 
-        self.clientCache: Dict[str, Client] = {}
+        self.userEnv = userEnv
         self.settings = settings
         self.appserverUrl = "http://" + settings.appserver + ":" + str(settings.appserverPort) + "/"
 
+        # vorberechnete Präfixe für die Cache-Keys, damit die häufig
+        # aufgerufenen get*Client-Methoden weniger Strings zusammensetzen
+        self._appCachePrefix = "APP:" + userEnv + ":"
+        self._webCachePrefix = "WEB:" + str(settings.webserverUser) + ":"
+
     def getAppClient(self, package: str, name: str) -> Client:
         """Erzeugt einen zeep - Client für den APP-Server.
            Mittels dieses Clients kann die WSDL Schnittstelle angesprochen werden.
@@ -79,6 +133,12 @@ class APplusServerConnection:
            z.B. mittels "client.service.getCompleteSQL(sql)" vom AppServer ein Vervollständigen
            des SQLs angefordert werden.
 
+           Der Aufruf lädt und parst die WSDL der Schnittstelle, sofern der
+           Client nicht schon im Cache liegt. Aufrufer sollten den Client
+           daher erst beim ersten wirklichen Service-Aufruf anfordern, wie
+           es die client-Properties von APplusJob, APplusScriptTool und
+           APplusSysConf sowie die cached_properties von APplusServer tun.
+
            :param package: das Packet, z.B. "p2core"
            :type package: str
            :param name: der Name im Packet, z.B. "Table"
@@ -86,14 +146,15 @@ class APplusServerConnection:
            :return: den Client
            :rtype: Client
            """
-        cacheKey = "APP:"+package+"/"+name
-        try:
-            return self.clientCache[cacheKey]
-        except:
-            fullClientUrl = self.appserverUrl + package+"/"+name + ".jws?wsdl"
-            client = Client(fullClientUrl, transport=self.transportApp)
-            self.clientCache[cacheKey] = client
-            return client
+        fullClientUrl = self.appserverUrl + package+"/"+name + ".jws?wsdl"
+        cacheKey = self._appCachePrefix + fullClientUrl
+        # get statt try/except: kein Exception-Aufbau auf dem Miss-Pfad und
+        # KeyErrors aus der Client-Konstruktion werden nicht verschluckt
+        client = _zeepClientCache.get(cacheKey)
+        if client is None:
+            client = Client(fullClientUrl, transport=self.transportApp, settings=_zeepSettings)
+            _zeepClientCache[cacheKey] = client
+        return client
 
     def getWebClient(self, url: str) -> Client:
         """Erzeugt einen zeep - Client für den Web-Server.
@@ -111,11 +172,10 @@ class APplusServerConnection:
         if not auth_negotiate_present:
             raise Exception("getWebClient ist nicht verfügbar, da Python-Package requests-negotiate-sspi nicht gefunden wurde")
 
-        cacheKey = "WEB:"+url
-        try:
-            return self.clientCache[cacheKey]
-        except:
-            fullClientUrl = self.settings.webserver + url + "?wsdl"
-            client = Client(fullClientUrl, transport=self.transportWeb)
-            self.clientCache[cacheKey] = client
-            return client
+        fullClientUrl = self.settings.webserver + url + "?wsdl"
+        cacheKey = self._webCachePrefix + fullClientUrl
+        client = _zeepClientCache.get(cacheKey)
+        if client is None:
+            client = Client(fullClientUrl, transport=self.transportWeb, settings=_zeepSettings)
+            _zeepClientCache[cacheKey] = client
+        return client
@@ -6,12 +6,16 @@
 # license that can be found in the LICENSE file or at
 # https://opensource.org/licenses/MIT.
 
-from typing import TYPE_CHECKING, Optional, Dict, Any, Callable, Sequence
+from typing import TYPE_CHECKING, Optional, Dict, Any, Callable, Sequence, Tuple
 from zeep import Client
 
 if TYPE_CHECKING:
     from .applus import APplusServer
 
+_MISS = object()
+"""Sentinel für Cache-Misses; erlaubt get mit nur einem Dictionary-Zugriff,
+   auch wenn None ein gültiger gecachter Wert ist"""
+
 
 class APplusSysConf:
     """
@@ -23,7 +27,7 @@ class APplusSysConf:
     """
 
     def __init__(self, server: 'APplusServer') -> None:
-        self.cache: Dict[str, type] = {}
+        self.cache: Dict[Tuple[str, str, str], Any] = {}
         self.server = server
         self._client = None
 
@@ -38,13 +42,40 @@ class APplusSysConf:
         self.cache = {}
 
     def _getGeneral(self, ty: str, f: Callable[[str, str], Any], module: str, name: str, useCache: bool) -> Any:
-        cacheKey = module + "/" + name + "/" + ty
-        if useCache and cacheKey in self.cache:
-            return self.cache[cacheKey]
-        else:
-            v = f(module, name)
-            self.cache[cacheKey] = v
-            return v
+        # Tupel-Key statt String-Konkatenation und nur ein Dictionary-Zugriff
+        cacheKey = (module, name, ty)
+        if useCache:
+            v = self.cache.get(cacheKey, _MISS)
+            if not (v is _MISS):
+                return v
+        v = f(module, name)
+        self.cache[cacheKey] = v
+        return v
+
+    def prefetch(self, specs: Sequence[Tuple[str, str, str]]) -> None:
+        """
+        Lädt mehrere SysConf-Einträge parallel in den Cache. Die SOAP-Aufrufe
+        laufen über den Thread-Pool des Servers gleichzeitig, so dass ein
+        Script, das viele Einträge braucht, nicht pro Eintrag einen
+        Netzwerk-Roundtrip warten muss. Anschließende get*-Aufrufe werden
+        komplett aus dem Cache bedient.
+
+        :param specs: die zu ladenden Einträge als Tupel (module, name, ty),
+           wobei ty "string", "int", "double" oder "boolean" ist
+        :type specs: Sequence[Tuple[str, str, str]]
+        """
+        missing = [(module, name, ty) for (module, name, ty) in specs
+                   if not ((module, name, ty) in self.cache)]
+        if not missing:
+            return
+
+        def fetch(spec: Tuple[str, str, str]) -> Any:
+            module, name, ty = spec
+            f = getattr(self.client.service, "get" + ty.capitalize())
+            return f(module, name)
+
+        for spec, v in zip(missing, self.server._soapPool.map(fetch, missing)):
+            self.cache[spec] = v
 
     def getString(self, module: str, name: str, useCache: bool = True) -> str:
         return self._getGeneral("string", self.client.service.getString, module, name, useCache)
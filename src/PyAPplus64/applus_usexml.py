@@ -6,29 +6,73 @@
 # license that can be found in the LICENSE file or at
 # https://opensource.org/licenses/MIT.
 
+import binascii
 import lxml.etree as ET  # type: ignore
 from . import sql_utils
 import datetime
-from typing import TYPE_CHECKING, Any, Dict, Optional
+import functools
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Type, TypeVar
 
 if TYPE_CHECKING:
     from .applus import APplusServer
 
 
+_normDBfield = functools.lru_cache(maxsize=2048)(sql_utils.normaliseDBfield)
+"""memoisierte Normalisierung der Feldnamen; normaliseDBfield ist pur und
+   dieselben Spaltennamen tauchen über tausende Rows hinweg immer wieder auf"""
+
+
+def _fmtDatetime(v: datetime.datetime) -> str:
+    """formatiert ein datetime als "YYYY-MM-DD HH:MM:SS.mmm"; der direkte
+       Attributzugriff ist deutlich schneller als strftime samt Slicing"""
+    return (f"{v.year:04}-{v.month:02}-{v.day:02} "
+            f"{v.hour:02}:{v.minute:02}:{v.second:02}.{v.microsecond // 1000:03}")
+
+
+def _fmtDate(v: datetime.date) -> str:
+    """formatiert ein date als "YYYY-MM-DD" """
+    return f"{v.year:04}-{v.month:02}-{v.day:02}"
+
+
+def _fmtTime(v: datetime.time) -> str:
+    """formatiert ein time als "HH:MM:SS.mmm" """
+    return f"{v.hour:02}:{v.minute:02}:{v.second:02}.{v.microsecond // 1000:03}"
+
+
+_FORMATTERS: Dict[type, Any] = {
+    str: lambda v: v,
+    int: str,
+    bool: str,
+    float: str,
+    datetime.datetime: _fmtDatetime,
+    datetime.date: _fmtDate,
+    datetime.time: _fmtTime,
+    bytes: lambda v: binascii.b2a_hex(v).decode("ascii"),
+    type(None): lambda v: "",
+}
+"""Dispatch-Tabelle für :func:`_formatValueForXMLRow`: ein dict-Lookup auf
+   dem exakten Typ ersetzt die isinstance-Kette für die häufigen Fälle"""
+
+
 def _formatValueForXMLRow(v: Any) -> str:
     """Hilfsfunktion zum Formatieren eines Wertes für XML"""
-    if (v is None):
-        return ""
+    fn = _FORMATTERS.get(type(v))
+    if fn is not None:
+        return fn(v)
+
+    # langsamer Pfad für Subklassen der bekannten Typen
     if isinstance(v, (int, float)):
         return str(v)
     elif isinstance(v, str):
         return v
     elif isinstance(v, datetime.datetime):
-        return v.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+        return _fmtDatetime(v)
     elif isinstance(v, datetime.date):
-        return v.strftime("%Y-%m-%d")
+        return _fmtDate(v)
     elif isinstance(v, datetime.time):
-        return v.strftime("%H:%M:%S.%f")[:-3]
+        return _fmtTime(v)
+    elif isinstance(v, bytes):
+        return binascii.b2a_hex(v).decode("ascii")
     else:
         return str(v)
 
@@ -70,10 +114,10 @@ class UseXmlRow:
         """Hilfsfunktion, die das eigentliche XML baut"""
         row = ET.Element("row", cmd=self.cmd, table=self.table, nsmap={"dt": "urn:schemas-microsoft-com:datatypes"})
 
+        # SubElement legt den Knoten direkt unter row an, statt ihn separat
+        # zu erzeugen und anschließend umzuhängen
         for name, value in self.fields.items():
-            child = ET.Element(name)
-            child.text = _formatValueForXMLRow(value)
-            row.append(child)
+            ET.SubElement(row, name).text = _formatValueForXMLRow(value)
 
         return row
 
@@ -84,12 +128,20 @@ class UseXmlRow:
         """
         return ET.tostring(self._buildXML(), encoding="unicode", pretty_print=True)
 
+    def toxml(self) -> str:
+        """
+        Gibt das XML unformatiert aus; der AppServer braucht die Einrückung
+        nicht, für :meth:`exec` entfallen so Pretty-Print-Aufwand und die
+        zusätzlichen Whitespace-Bytes im Request.
+        """
+        return ET.tostring(self._buildXML(), encoding="unicode")
+
     def getField(self, name: str) -> Any:
         """Liefert den Wert eines gesetzten Feldes"""
 
         if name is None:
             return None
-        name = sql_utils.normaliseDBfield(name)
+        name = _normDBfield(name)
 
         if name in self.fields:
             return self.fields[name]
@@ -102,7 +154,7 @@ class UseXmlRow:
         """Prüft, ob ein Feld gesetzt wurde"""
         if name is None:
             return False
-        name = sql_utils.normaliseDBfield(name)
+        name = _normDBfield(name)
         return (name in self.fields) or (name == "MANDANT")
 
     def checkFieldsSet(self, *names: str) -> bool:
@@ -123,7 +175,7 @@ class UseXmlRow:
         if name is None:
             return
 
-        self.fields[sql_utils.normaliseDBfield(name)] = value
+        self.fields[_normDBfield(name)] = value
 
     def addTimestampField(self, id: int, ts: Optional[bytes] = None) -> None:
         """
@@ -143,7 +195,9 @@ class UseXmlRow:
         if ts is None:
             ts = self.applus.dbQuerySingleValue("select timestamp from " + self.table + " where id = ?", id)
         if ts:
-            self.addField("timestamp", ts.hex())
+            # die Bytes werden unverändert gespeichert; die Hex-Darstellung
+            # entsteht erst bei der XML-Serialisierung und nur falls nötig
+            self.addField("timestamp", ts)
         else:
             raise Exception("kein Eintrag in Tabelle '" + self.table + " mit ID " + str(id) + " gefunden")
 
@@ -165,7 +219,41 @@ class UseXmlRow:
         Führt die UseXmlRow mittels useXML aus. Je nach Art der Zeile wird etwas zurückgeliefert oder nicht.
         In jedem Fall kann eine Exception geworfen werden.
         """
-        return self.applus.useXML(self.toprettyxml())
+        return self.applus.useXML(self.toxml())
+
+
+_checkExistsSqlCache: Dict[Any, Any] = {}
+"""modulweiter Cache der SQL-Skelette für
+   :meth:`UseXmlRowInsertOrUpdate.checkExists`, Key ist
+   (Tabelle, beteiligte Index-Felder)"""
+
+_RowWithID = TypeVar('_RowWithID', bound='UseXmlRow')
+
+
+def _buildRowsWithTimestamps(cls: Type[_RowWithID], applus: 'APplusServer',
+                             table: str, ids: Sequence[int]) -> List[_RowWithID]:
+    """
+    Hilfsfunktion für :meth:`UseXmlRowUpdate.many` und
+    :meth:`UseXmlRowDelete.many`: lädt die Timestamps aller IDs mit einer
+    einzigen Query statt einem Roundtrip pro Objekt und baut daraus die
+    Row-Objekte.
+    """
+    if not ids:
+        return []
+
+    sql = ("select id, timestamp from " + table +
+           " where id in (" + ",".join("?" * len(ids)) + ")")
+    tsMap: Dict[int, bytes] = {}
+    for row in applus.dbQueryAll(sql, *ids):
+        tsMap[row.id] = row.timestamp
+
+    rows: List[_RowWithID] = []
+    for id in ids:
+        ts = tsMap.get(id)
+        if ts is None:
+            raise Exception("kein Eintrag in Tabelle '" + table + " mit ID " + str(id) + " gefunden")
+        rows.append(cls(applus, table, id, ts=ts))  # type: ignore[call-arg]
+    return rows
 
 
 class UseXmlRowInsert(UseXmlRow):
@@ -209,6 +297,21 @@ class UseXmlRowDelete(UseXmlRow):
         super().__init__(applus, table, "delete")
         self.addTimestampIDFields(id, ts=ts)
 
+    @classmethod
+    def many(cls, applus: 'APplusServer', table: str, ids: Sequence[int]) -> List['UseXmlRowDelete']:
+        """
+        Erzeugt Delete-Rows für mehrere IDs; die Timestamps werden mit einer
+        einzigen Query geladen statt pro Objekt einen DB-Roundtrip zu machen.
+
+        :param applus: Verbindung zu APplus
+        :type applus: APplusServer
+        :param table: die Tabelle
+        :type table: string
+        :param ids: die zu löschenden IDs
+        :return: die Delete-Rows in der Reihenfolge der IDs
+        """
+        return _buildRowsWithTimestamps(cls, applus, table, ids)
+
     def delete(self) -> None:
         """
         Führt das delete aus. Evtl. wird dabei eine Exception geworfen.
@@ -236,6 +339,21 @@ class UseXmlRowUpdate(UseXmlRow):
         super().__init__(applus, table, "update")
         self.addTimestampIDFields(id, ts=ts)
 
+    @classmethod
+    def many(cls, applus: 'APplusServer', table: str, ids: Sequence[int]) -> List['UseXmlRowUpdate']:
+        """
+        Erzeugt Update-Rows für mehrere IDs; die Timestamps werden mit einer
+        einzigen Query geladen statt pro Objekt einen DB-Roundtrip zu machen.
+
+        :param applus: Verbindung zu APplus
+        :type applus: APplusServer
+        :param table: die Tabelle
+        :type table: string
+        :param ids: die IDs der zu ändernden Datensätze
+        :return: die Update-Rows in der Reihenfolge der IDs
+        """
+        return _buildRowsWithTimestamps(cls, applus, table, ids)
+
     def update(self) -> None:
         """
         Führt das update aus. Evtl. wird dabei eine Exception geworfen.
@@ -244,6 +362,48 @@ class UseXmlRowUpdate(UseXmlRow):
         super().exec()
 
 
+class UseXmlBatch:
+    """
+    Sammelt mehrere :class:`UseXmlRow` und übergibt sie mit einem einzigen
+    useXML-Aufruf als gemeinsames Dokument an den AppServer. Für Bulk-Loads
+    kollabieren so N HTTP-Roundtrips zu einem; Reihenfolge und Fehler
+    werden vom Server pro Zeile behandelt bzw. gemeldet.
+
+    :param applus: Verbindung zu APplus
+    :type applus: APplusServer
+    """
+
+    def __init__(self, applus: 'APplusServer') -> None:
+        self.applus = applus
+        self.rows: List[ET.Element] = []
+        """die bereits gebauten row-Knoten in Einfüge-Reihenfolge"""
+
+    def add(self, row: UseXmlRow) -> None:
+        """
+        Fügt eine Zeile zum Batch hinzu. Das XML wird sofort gebaut;
+        spätere Änderungen an der Row wirken sich nicht mehr aus.
+
+        :param row: die Zeile
+        :type row: UseXmlRow
+        """
+        self.rows.append(row._buildXML())
+
+    def toxml(self) -> str:
+        """liefert das gesamte Batch-Dokument als unformatierten String"""
+        root = ET.Element("data")
+        for r in self.rows:
+            root.append(r)
+        return ET.tostring(root, encoding="unicode")
+
+    def exec(self) -> Any:
+        """
+        Schickt alle gesammelten Zeilen mit einem useXML-Aufruf an den
+        AppServer. Wie bei :meth:`UseXmlRow.exec` kann dabei eine
+        Exception geworfen werden.
+        """
+        return self.applus.useXML(self.toxml())
+
+
 class UseXmlRowInsertOrUpdate(UseXmlRow):
     """
     Klasse, die eine XML-Datei für das Einfügen oder Ändern eines neuen Datensatzes, erzeugen kann.
@@ -261,31 +421,59 @@ class UseXmlRowInsertOrUpdate(UseXmlRow):
     def __init__(self, applus: 'APplusServer', table: str) -> None:
         super().__init__(applus, table, "")
 
+    def _buildCheckSql(self, participating: Any) -> Any:
+        """
+        Baut das SQL für :meth:`checkExists` mit Parameter-Platzhaltern und
+        cached es modulweit pro (Tabelle, beteiligte Indices samt
+        None-Markierung). Beim Upsert vieler Datensätze derselben Tabelle
+        wird der Bedingungsbaum so nur einmal konstruiert, pro Datensatz
+        werden nur noch Werte gebunden.
+        """
+        key = (self.table, participating)
+        cached = _checkExistsSqlCache.get(key)
+        if cached is None:
+            cond = sql_utils.SqlConditionOr()
+            params = []
+            for fs in participating:
+                condIdx = sql_utils.SqlConditionAnd()
+                for (f, isNull) in fs:
+                    if isNull:
+                        # auf None gesetzte Felder müssen als "is null" ins
+                        # SQL; ein gebundener None-Parameter ergäbe "F = NULL"
+                        # und würde nie matchen
+                        condIdx.addConditionFieldEq(f, None)
+                    else:
+                        condIdx.addConditionFieldEq(f, sql_utils.sqlParam)
+                        params.append(f)
+                cond.addCondition(condIdx)
+
+            sql = sql_utils.SqlStatementSelect(self.table, "id")
+            sql.where = cond
+            cached = (str(sql), tuple(params))
+            _checkExistsSqlCache[key] = cached
+        return cached
+
     def checkExists(self) -> Optional[int]:
         """
         Prüft, ob der Datensatz bereits in der DB existiert.
         Ist dies der Fall, wird die ID geliefert, sonst None
         """
 
-        # Baue Bedingung
-        cond = sql_utils.SqlConditionOr()
-        for idx, fs in self.applus.getUniqueFieldsOfTable(self.table).items():
-            if (self.checkFieldsSet(*fs)):
-                condIdx = sql_utils.SqlConditionAnd()
-                for f in fs:
-                    condIdx.addConditionFieldEq(f, self.getField(f))
-                cond.addCondition(condIdx)
-
-        sql = sql_utils.SqlStatementSelect(self.table, "id")
-        sql.where = cond
-        return self.applus.dbQuerySingleValue(sql)
+        # pro Feld merken, ob es auf None gesetzt ist; davon hängt die Form
+        # der Bedingung (Parameter vs. "is null") und damit der Cache-Key ab
+        participating = tuple(tuple((f, self.getField(f) is None) for f in fs)
+                              for fs in self.applus.getUniqueFieldsOfTable(self.table).values()
+                              if self.checkFieldsSet(*fs))
+        sqlStr, paramFields = self._buildCheckSql(participating)
+        return self.applus.dbQuerySingleValue(sqlStr, *[self.getField(f) for f in paramFields])
 
     def insert(self) -> int:
         """Führt ein Insert aus. Existiert das Objekt bereits, wird eine Exception geworfen."""
 
         r = UseXmlRowInsert(self.applus, self.table)
-        for k, v in self.fields.items():
-            r.addField(k, v)
+        # die Keys in self.fields sind bereits normalisiert; die Kopie als
+        # dict-Update erspart die erneute Normalisierung pro Feld
+        r.fields.update(self.fields)
         return r.insert()
 
     def update(self, id: Optional[int] = None, ts: Optional[bytes] = None) -> int:
@@ -299,8 +487,9 @@ class UseXmlRowInsertOrUpdate(UseXmlRow):
             raise Exception("Update nicht möglich, da kein Objekt für Update gefunden.")
 
         r = UseXmlRowUpdate(self.applus, self.table, id, ts=ts)
-        for k, v in self.fields.items():
-            r.addField(k, v)
+        # wie bei insert: Keys sind bereits normalisiert, dict-Update statt
+        # addField-Schleife
+        r.fields.update(self.fields)
         r.update()
         return id
 
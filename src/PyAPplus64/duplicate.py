@@ -15,6 +15,7 @@ from . import applus_db
 from . import applus_usexml
 from .applus import APplusServer
 import pyodbc  # type: ignore
+import pickle
 import traceback
 import logging
 from typing import List, Set, Optional, Dict, Tuple, Sequence, Any, Union
@@ -144,6 +145,31 @@ class DuplicateBusinessObject():
                 "connection": args2
             })
 
+    def dumpsBinary(self) -> bytes:
+        """
+        Serialisiert das DuplicateBusinessObject inklusive aller
+        Unterobjekte in einen kompakten Byte-String. Dies ist deutlich
+        schneller als eine YAML-Ausgabe und für das reine Zwischenspeichern
+        und spätere Wiedereinlesen gedacht. Das Ergebnis ist nicht für
+        Menschen lesbar; hierfür bietet sich weiterhin YAML an.
+
+        :rtype: bytes
+        """
+        return pickle.dumps(self, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def loadsBinary(data: bytes) -> 'DuplicateBusinessObject':
+        """
+        Liest ein mit :meth:`dumpsBinary` serialisiertes
+        DuplicateBusinessObject wieder ein. Wie bei Pickle üblich dürfen
+        nur vertrauenswürdige Daten geladen werden.
+
+        :param data: die serialisierten Daten
+        :type data: bytes
+        :rtype: DuplicateBusinessObject
+        """
+        return pickle.loads(data)
+
     def getField(self, field: str, onlyCopied: bool = False) -> Any:
         """
         Schlägt den Wert eines Feldes nach. Wenn onlyCopied gesetzt ist, werden nur Felder zurückgeliefert, die auch kopiert
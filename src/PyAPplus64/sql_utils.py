@@ -22,22 +22,28 @@ APplus. Oft ist es sinnvoll, solche Parameter zu verwenden.
 from __future__ import annotations
 import datetime
 import numpy
+import sys
 from typing import Set, Sequence, Union, Optional, cast, List
 
 
 def normaliseDBfield(f: str) -> str:
-    """Normalisiert die Darstellung eines DB-Feldes"""
-    return str(f).upper()
+    """Normalisiert die Darstellung eines DB-Feldes. Das Ergebnis wird
+       interniert, da dieselben Feldnamen sehr häufig als Dictionary- und
+       Mengen-Schlüssel auftauchen; Vergleiche laufen dann über die
+       Objekt-Identität."""
+    return sys.intern(str(f).upper())
 
 
 def normaliseDBfieldSet(s: Set[str]) -> Set[str]:
     """Normalisiert eine Menge von DB-Feldern"""
-    return {normaliseDBfield(f) for f in s}
+    # map läuft komplett in C; für str-Eingaben ruft das str.upper direkt
+    # pro Element auf, ohne Python-Frame je Feld
+    return set(map(sys.intern, map(str.upper, map(str, s))))
 
 
 def normaliseDBfieldList(fields: Sequence[str]) -> Sequence[str]:
     """Normalisiert eine Menge von DB-Feldern"""
-    return [normaliseDBfield(f) for f in fields]
+    return list(map(sys.intern, map(str.upper, map(str, fields))))
 
 
 class SqlField():
@@ -485,12 +491,25 @@ class SqlConditionList(SqlCondition):
         self.emptyCond: str = emptyCond
         self.elems: List[SqlCondition] = []
 
+        self._version: int = 0
+        """Zähler, der bei jeder Änderung erhöht wird; erlaubt Cache-Invalidierung"""
+
+    def _treeVersion(self) -> int:
+        """Version dieser Liste einschließlich aller geschachtelten Listen.
+           Alle anderen Bedingungen sind nach Konstruktion unveränderlich."""
+        v = self._version
+        for e in self.elems:
+            if isinstance(e, SqlConditionList):
+                v += e._treeVersion()
+        return v
+
     def addCondition(self, cond: Union[SqlCondition, str, None]) -> None:
         if (cond is None):
             return
         if not (isinstance(cond, SqlCondition)):
             cond = SqlConditionPrepared("("+str(cond)+")")
         self.elems.append(cond)
+        self._version += 1
 
     def addConditions(self, *conds: Union[SqlCondition, str, None]) -> None:
         for cond in conds:
@@ -563,11 +582,8 @@ class SqlConditionList(SqlCondition):
         elif elemLen == 1:
             return self.elems[0].getCondition()
         else:
-            res = "(" + self.elems[0].getCondition()
-            for i in range(1, elemLen):
-                res += " {} {}".format(self.connector, self.elems[i].getCondition())
-            res += ")"
-            return res
+            sep = " " + self.connector + " "
+            return "(" + sep.join(e.getCondition() for e in self.elems) + ")"
 
 
 class SqlConditionDateTimeFieldInRange(SqlConditionPrepared):
@@ -748,9 +764,32 @@ class SqlStatementSelect():
         self.order: Optional[str] = None
         """Sortierung"""
 
+        self._cached_sql: Optional[str] = None
+        """der zuletzt gebaute SQL-String, siehe :meth:`getSql`"""
+
+        self._cached_fingerprint: Optional[tuple] = None
+        """Zustand des Statements, zu dem _cached_sql gehört"""
+
     def __str__(self) -> str:
         return self.getSql()
 
+    def _fingerprint(self) -> tuple:
+        """Hilfsfunktion, die den für das SQL relevanten Zustand zusammenfasst.
+           Ändert sich der Zustand, wird das SQL in :meth:`getSql` neu gebaut.
+
+           Neben den Versionszählern gehören die Bedingungs-Objekte selbst
+           zum Fingerprint: where, having und die Join-Listen sind öffentliche
+           Attribute und dürfen komplett neu zugewiesen werden; der Vergleich
+           der Objekte (Identität, SqlCondition definiert kein __eq__) erkennt
+           das. Da der alte Fingerprint die Objekte referenziert, kann eine
+           neue Bedingung auch nicht zufällig dieselbe id() erben."""
+        return (self.table, self.top, self.order,
+                tuple(self.fields), tuple(self.groupBy),
+                self.where, self.where._treeVersion(),
+                self.having, self.having._treeVersion(),
+                tuple((j, j.on._treeVersion()) if isinstance(j, SqlJoin) else j
+                      for j in self.joins))
+
     def addFields(self, *fields: str) -> None:
         """Fügt ein oder mehrere Felder, also auszuwählende Werte zu einem SQL-Statement hinzu."""
         for f in fields:
@@ -792,39 +831,32 @@ class SqlStatementSelect():
         return j
 
     def getSql(self) -> str:
-        """Liefert das SQL-SELECT-Statement als String"""
+        """Liefert das SQL-SELECT-Statement als String.
+           Der String wird gecached und nur neu gebaut, wenn sich das
+           Statement seit dem letzten Aufruf geändert hat."""
+        fingerprint = self._fingerprint()
+        if not (self._cached_sql is None) and self._cached_fingerprint == fingerprint:
+            return self._cached_sql
+
         def getFields() -> str:
-            fieldsLen = len(self.fields)
-            if fieldsLen == 0:
+            if not self.fields:
                 return "*"
-            elif fieldsLen == 1:
-                return str(self.fields[0])
-            else:
-                res = str(self.fields[0])
-                for i in range(1, fieldsLen):
-                    res += ", " + str(self.fields[i])
-                return res
+            return ", ".join(map(str, self.fields))
 
         def getGroupBy() -> str:
             groupByLen = len(self.groupBy)
             if groupByLen == 0:
                 return ""
             else:
-                res = " GROUP BY " + str(self.fields[0])
-                for i in range(1, groupByLen):
-                    res += ", " + str(self.fields[i])
+                res = " GROUP BY " + ", ".join(map(str, self.fields[:groupByLen]))
                 if not (self.having.isEmpty()):
                     res += " HAVING " + str(self.having)
                 return res
 
         def getJoins() -> str:
-            if (len(self.joins) == 0):
+            if not self.joins:
                 return ""
-            else:
-                res = ""
-                for i in range(0, len(self.joins)):
-                    res += " " + str(self.joins[i])
-                return res
+            return " " + " ".join(map(str, self.joins))
 
         def getWhere() -> str:
             if self.where.isEmpty():
@@ -844,7 +876,10 @@ class SqlStatementSelect():
             else:
                 return "TOP " + str(self.top) + " "
 
-        return "SELECT " + getTop() + getFields() + " FROM " + self.table + getJoins() + getWhere() + getGroupBy() + getOrder()
+        res = "SELECT " + getTop() + getFields() + " FROM " + self.table + getJoins() + getWhere() + getGroupBy() + getOrder()
+        self._cached_sql = res
+        self._cached_fingerprint = fingerprint
+        return res
 
 
 SqlStatement = Union[SqlStatementSelect, str]
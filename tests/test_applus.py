@@ -0,0 +1,389 @@
+# Copyright (c) 2023 Thomas Tuerk (kontakt@thomas-tuerk.de)
+#
+# This file is part of PyAPplus64 (see https://www.thomas-tuerk.de/de/pyapplus64).
+#
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+
+import asyncio
+import threading
+import time
+
+import pyodbc  # type: ignore
+
+from PyAPplus64 import applus
+from PyAPplus64 import applus_async
+from PyAPplus64 import applus_db
+from PyAPplus64 import applus_server
+from PyAPplus64 import applus_sysconf
+
+
+class DummyCursor:
+    """Cursor-Dummy, kennt wie pyodbc seine Verbindung"""
+
+    def __init__(self, conn: 'DummyConn') -> None:
+        self.connection = conn
+
+    def execute(self, sql: str, *args: object) -> 'DummyCursor':
+        return self
+
+    def fetchone(self) -> None:
+        return None
+
+    def close(self) -> None:
+        pass
+
+
+class DummyConn:
+    """einfacher Verbindungs-Dummy für Pool-Tests"""
+
+    def __init__(self) -> None:
+        self._autocommit = True
+        self.closed = False
+
+    # wie pyodbc: Zugriff auf eine geschlossene Verbindung wirft
+    @property
+    def autocommit(self) -> bool:
+        if self.closed:
+            raise pyodbc.ProgrammingError("Attempt to use a closed connection.")
+        return self._autocommit
+
+    @autocommit.setter
+    def autocommit(self, value: bool) -> None:
+        if self.closed:
+            raise pyodbc.ProgrammingError("Attempt to use a closed connection.")
+        self._autocommit = value
+
+    def getinfo(self, what: int) -> bool:
+        # wie pyodbc: SQL_ATTR_CONNECTION_DEAD ist kein SQLGetInfo-Typ,
+        # getinfo darf für die Lebendprüfung nicht benutzt werden
+        raise pyodbc.ProgrammingError("Unsupported getinfo value: " + str(what))
+
+    def cursor(self) -> DummyCursor:
+        return DummyCursor(self)
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def mkServer(webserver=None, dbPoolMaxSize=8) -> applus.APplusServer:  # type: ignore[no-untyped-def]
+    dbSettings = applus_db.APplusDBSettings("server", "db", "user", "pwd")
+    serverSettings = applus_server.APplusServerSettings(
+        webserver=webserver, appserver="appserver", appserverPort=1, user="user")
+    server = applus.APplusServer(dbSettings, serverSettings, dbPoolMaxSize=dbPoolMaxSize)
+    server.db_settings.connect = lambda autocommit=False: DummyConn()  # type: ignore[method-assign]
+    return server
+
+
+class DummyTableClient:
+    """zählt getCompleteSQL-Aufrufe für Cache-Tests"""
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+        class Service:
+            def getCompleteSQL(_self, sql: str) -> str:
+                self.calls += 1
+                return "COMPLETED: " + sql
+        self.service = Service()
+
+
+def test_completeSQLCached() -> None:
+    # wiederholtes Vervollständigen desselben Statements macht nur einen Aufruf
+    server = mkServer()
+    server.client_table = DummyTableClient()  # type: ignore[assignment]
+    assert (server.completeSQL("select 1") == "COMPLETED: select 1")
+    assert (server.completeSQL("select 1") == "COMPLETED: select 1")
+    assert (server.client_table.calls == 1)
+
+    server.invalidateCompleteSQLCache()
+    assert (server.completeSQL("select 1") == "COMPLETED: select 1")
+    assert (server.client_table.calls == 2)
+
+
+def test_completeSQLRaw() -> None:
+    # raw=True liefert die Eingabe unverändert und ruft den Server nicht
+    server = mkServer()
+    server.client_table = DummyTableClient()  # type: ignore[assignment]
+    assert (server.completeSQL("select 1", raw=True) == "select 1")
+    assert (server.client_table.calls == 0)
+
+
+def test_completeSQLBatch() -> None:
+    # Batch-Vervollständigung bedient Duplikate und Gecachtes aus dem Cache
+    server = mkServer()
+    server.client_table = DummyTableClient()  # type: ignore[assignment]
+    res = server.completeSQLBatch(["select 1", "select 2", "select 1"])
+    assert (res == ["COMPLETED: select 1", "COMPLETED: select 2", "COMPLETED: select 1"])
+    assert (server.client_table.calls == 2)
+
+
+def test_zeepClientCacheSharedAcrossConnections(monkeypatch) -> None:  # type: ignore[no-untyped-def]
+    # Clients werden modulweit gecached: gleiche URL plus Nutzer/Umgebung
+    # liefert über Verbindungs-Instanzen hinweg dasselbe Objekt
+    created = []
+
+    class FakeClient:
+        def __init__(self, url: str, transport=None, settings=None) -> None:  # type: ignore[no-untyped-def]
+            created.append(url)
+
+    monkeypatch.setattr(applus_server, "Client", FakeClient)
+    monkeypatch.setattr(applus_server, "_zeepClientCache", {})
+
+    settings = applus_server.APplusServerSettings(
+        webserver=None, appserver="appserver", appserverPort=1, user="user")
+    conn1 = applus_server.APplusServerConnection(settings)
+    conn2 = applus_server.APplusServerConnection(settings)
+
+    c1 = conn1.getAppClient("p2core", "Table")
+    c2 = conn2.getAppClient("p2core", "Table")
+    assert (c1 is c2)
+    assert (len(created) == 1)
+
+    # andere Schnittstelle erzeugt einen eigenen Client
+    conn1.getAppClient("p2core", "XML")
+    assert (len(created) == 2)
+
+
+def test_connectionPoolDistinct() -> None:
+    # zwei gleichzeitige Checkouts dürfen nie dieselbe Verbindung liefern
+    server = mkServer()
+    c1 = server.getDBConnection()
+    c2 = server.getDBConnection()
+    assert not (c1 is c2)
+
+
+def test_connectionPoolReuse() -> None:
+    # freigegebene Verbindungen werden wiederverwendet (LIFO)
+    server = mkServer()
+    c1 = server.getDBConnection()
+    server.releaseDBConnection(c1)
+    c2 = server.getDBConnection()
+    assert (c1 is c2)
+
+
+def test_makeWebLink() -> None:
+    # Parameter werden per urlencode angehängt, None-Werte entfallen
+    server = mkServer(webserver="https://webserver/")
+    link = server.makeWebLink("wp/artikelRec.aspx", artikel="a 1", position=None, nr=7)
+    assert (link == "https://webserver/wp/artikelRec.aspx?artikel=a%201&nr=7")
+
+    # ohne Parameter kein Fragezeichen
+    assert (server.makeWebLink("wp/artikelRec.aspx") == "https://webserver/wp/artikelRec.aspx")
+
+
+def test_makeWebLinkNoWebserver() -> None:
+    # ohne konfigurierten Webserver gibt es eine verständliche Fehlermeldung
+    server = mkServer()
+    try:
+        server.makeWebLink("wp/artikelRec.aspx", artikel="a1")
+        assert False
+    except applus.NoWebBaseURLError:
+        pass
+
+
+def test_asyncCompleteSQL() -> None:
+    # die async-Wrapper laufen im Worker-Thread und lassen sich per gather bündeln
+    server = mkServer()
+    server.client_table = DummyTableClient()  # type: ignore[assignment]
+    aserver = applus_async.APplusServerAsync(server)
+
+    async def run():  # type: ignore[no-untyped-def]
+        return await asyncio.gather(
+            aserver.acompleteSQL("select 1"),
+            aserver.acompleteSQL("select 2"))
+
+    res = asyncio.run(run())
+    assert (res == ["COMPLETED: select 1", "COMPLETED: select 2"])
+
+
+def test_prepare() -> None:
+    # prepare vervollständigt genau einmal, Ausführungen nutzen den Cache nicht erneut
+    server = mkServer()
+    server.client_table = DummyTableClient()  # type: ignore[assignment]
+    stmt = server.prepare("update X set F=?")
+    assert (stmt.sql == "COMPLETED: update X set F=?")
+    assert (server.client_table.calls == 1)
+
+    # raw=True übernimmt den Text unverändert
+    stmtRaw = server.prepare("update X set F=?", raw=True)
+    assert (stmtRaw.sql == "update X set F=?")
+    assert (server.client_table.calls == 1)
+
+
+def test_sysconfCache() -> None:
+    # wiederholte Lookups desselben Schlüssels machen nur einen SOAP-Aufruf;
+    # auch None wird als gültiger Wert gecacht
+    server = mkServer()
+    sc = applus_sysconf.APplusSysConf(server)
+    calls = []
+
+    class Service:
+        def getString(self, module: str, name: str) -> None:
+            calls.append((module, name))
+            return None
+
+    class DummyClient:
+        service = Service()
+
+    sc._client = DummyClient()  # type: ignore[assignment]
+    assert (sc.getString("stammdaten", "x") is None)
+    assert (sc.getString("stammdaten", "x") is None)
+    assert (len(calls) == 1)
+
+    # useCache=False erzwingt einen neuen Aufruf
+    assert (sc.getString("stammdaten", "x", useCache=False) is None)
+    assert (len(calls) == 2)
+
+    sc.clearCache()
+    assert (sc.getString("stammdaten", "x") is None)
+    assert (len(calls) == 3)
+
+
+def test_sysconfPrefetch() -> None:
+    # prefetch füllt den Cache, get* macht danach keine weiteren Aufrufe
+    server = mkServer()
+    sc = applus_sysconf.APplusSysConf(server)
+    calls = []
+
+    class Service:
+        def getString(self, module: str, name: str) -> str:
+            calls.append(("s", module, name))
+            return "v"
+
+        def getInt(self, module: str, name: str) -> int:
+            calls.append(("i", module, name))
+            return 42
+
+    class DummyClient:
+        service = Service()
+
+    sc._client = DummyClient()  # type: ignore[assignment]
+    sc.prefetch([("m", "a", "string"), ("m", "b", "int")])
+    assert (len(calls) == 2)
+    assert (sc.getString("m", "a") == "v")
+    assert (sc.getInt("m", "b") == 42)
+    assert (len(calls) == 2)
+
+
+def test_applusFromConfigFileCached(tmp_path, monkeypatch) -> None:  # type: ignore[no-untyped-def]
+    # wiederholtes Laden derselben, unveränderten Config-Datei parst nur einmal
+    conf = tmp_path / "applus.yaml"
+    conf.write_text(
+        "appserver:\n"
+        "  server: appserver\n"
+        "  port: 1\n"
+        "  user: user\n"
+        "  env: env\n"
+        "dbserver:\n"
+        "  server: dbserver\n"
+        "  db: db\n"
+        "  user: dbuser\n"
+        "  password: pwd\n")
+
+    applus._loadConfigYamlCached.cache_clear()
+    server1 = applus.applusFromConfigFile(conf)
+    server2 = applus.applusFromConfigFile(conf)
+    assert (server1.db_settings.database == "db")
+    assert (server2.server_settings.user == "user")
+    assert (applus._loadConfigYamlCached.cache_info().hits == 1)
+    assert (applus._loadConfigYamlCached.cache_info().misses == 1)
+
+    # geänderte Datei (neue mtime) wird neu geladen
+    conf.write_text(conf.read_text().replace("db: db", "db: db2"))
+    server3 = applus.applusFromConfigFile(conf)
+    assert (server3.db_settings.database == "db2")
+    assert (applus._loadConfigYamlCached.cache_info().misses == 2)
+
+
+def test_connectionPoolWakesWaiter() -> None:
+    # ist der Pool erschöpft, wartet getDBConnection auf die Freigabe einer
+    # Verbindung statt dauerhaft zu blockieren
+    server = mkServer(dbPoolMaxSize=1)
+    c1 = server.getDBConnection()
+
+    got = []
+    t = threading.Thread(target=lambda: got.append(server.getDBConnection()))
+    t.start()
+    server.releaseDBConnection(c1)
+    t.join(timeout=5)
+    assert not t.is_alive()
+    assert (got[0] is c1)
+
+
+def test_connectionPoolWakesWaiterOnClose() -> None:
+    # auch eine geschlossene (statt freigegebene) Verbindung gibt ihr Token
+    # frei, so dass ein Wartender eine neue Verbindung öffnen kann
+    server = mkServer(dbPoolMaxSize=1)
+    c1 = server.getDBConnection()
+
+    got = []
+    t = threading.Thread(target=lambda: got.append(server.getDBConnection()))
+    t.start()
+    server.closeDBConnection(c1)
+    t.join(timeout=5)
+    assert not t.is_alive()
+    assert not (got[0] is c1)
+
+
+def test_connectionPoolReleaseClosedConn() -> None:
+    # eine vom Aufrufer direkt geschlossene Verbindung landet bei der
+    # Freigabe nicht im Pool, ihr Token wird trotzdem frei
+    server = mkServer(dbPoolMaxSize=1)
+    c1 = server.getDBConnection()
+    c1.close()
+    server.releaseDBConnection(c1)
+    c2 = server.getDBConnection()
+    assert not (c2 is c1)
+
+
+def test_connectionPoolValidatesIdleByProbe() -> None:
+    # frisch freigegebene Verbindungen werden ohne Prüfung wiederverwendet
+    # (DummyConn.getinfo wirft wie echtes pyodbc, darf also nie gerufen
+    # werden); lange ungenutzte werden per Mini-Query geprüft
+    server = mkServer()
+    c1 = server.getDBConnection()
+    server.releaseDBConnection(c1)
+    assert (server.getDBConnection() is c1)
+
+    # lange ungenutzt, Probe erfolgreich: Verbindung wird wiederverwendet
+    server.releaseDBConnection(c1)
+    server._connIdleSince[id(c1)] = time.monotonic() - 3600
+    assert (server.getDBConnection() is c1)
+
+    # lange ungenutzt, Probe schlägt fehl: Verbindung wird ersetzt
+    server.releaseDBConnection(c1)
+    server._connIdleSince[id(c1)] = time.monotonic() - 3600
+
+    def badExecute(sql: str, *args: object) -> DummyCursor:
+        raise pyodbc.Error("connection dead")
+    server._getSharedCursor(c1).execute = badExecute  # type: ignore[method-assign]
+    c2 = server.getDBConnection()
+    assert not (c2 is c1)
+    assert c1.closed
+
+
+def test_sharedCursorSurvivesIdReuse() -> None:
+    # verwendet CPython die id() einer selbst geschlossenen Verbindung für
+    # eine neue wieder, darf nicht der Cursor der alten geliefert werden
+    server = mkServer()
+    c1 = server.getDBConnection()
+    cur1 = server._getSharedCursor(c1)
+    assert (server._getSharedCursor(c1) is cur1)
+
+    # neue Verbindung mit derselben id simulieren
+    c2 = DummyConn()
+    server._sharedCursorCache[id(c2)] = cur1
+    cur2 = server._getSharedCursor(c2)
+    assert not (cur2 is cur1)
+    assert (cur2.connection is c2)
+
+
+def test_connectionPoolRestoresAutocommit() -> None:
+    # hat ein Aufrufer autocommit abgeschaltet, stellt die Freigabe es wieder her
+    server = mkServer()
+    c1 = server.getDBConnection()
+    c1.autocommit = False
+    server.releaseDBConnection(c1)
+    assert c1.autocommit
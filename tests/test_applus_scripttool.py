@@ -0,0 +1,78 @@
+# Copyright (c) 2023 Thomas Tuerk (kontakt@thomas-tuerk.de)
+#
+# This file is part of PyAPplus64 (see https://www.thomas-tuerk.de/de/pyapplus64).
+#
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+
+import threading
+
+import lxml.etree as ET  # type: ignore
+
+from PyAPplus64 import applus_scripttool
+
+
+def mkDefinition(xml: bytes) -> applus_scripttool.XMLDefinition:
+    return applus_scripttool.XMLDefinition(ET.fromstring(xml))
+
+
+def test_getDuplicate() -> None:
+    d = mkDefinition(
+        b'<object><duplicate type="include">'
+        b'<property xmlns="ref" ref="artikel"/>'
+        b'<property xmlns="ref" ref="bezeichnung"/>'
+        b'</duplicate></object>')
+    assert (d.getDuplicate() == ({"ARTIKEL", "BEZEICHNUNG"}, False))
+
+
+def test_getDuplicateDefaultExclude() -> None:
+    d = mkDefinition(
+        b'<object><duplicate>'
+        b'<property xmlns="ref" ref="id"/>'
+        b'</duplicate></object>')
+    assert (d.getDuplicate() == ({"ID"}, True))
+
+
+def test_getDuplicateMissing() -> None:
+    d = mkDefinition(b'<object/>')
+    assert (d.getDuplicate() == (set(), True))
+
+
+def test_getDuplicateCached() -> None:
+    # das Ergebnis wird auf der Instanz gecacht
+    d = mkDefinition(b'<object/>')
+    assert (d.getDuplicate() is d.getDuplicate())
+
+
+def test_getXMLDefinitionObjTopLevelObject(monkeypatch) -> None:  # type: ignore[no-untyped-def]
+    # geliefert wird das Top-Level-"object", nicht ein geschachtelter
+    # Knoten gleichen Namens; ohne "md5"-Knoten kommt None
+    tool = applus_scripttool.APplusScriptTool.__new__(applus_scripttool.APplusScriptTool)
+
+    doc = (b'<result><md5>abc</md5>'
+           b'<object name="top"><sub><object name="nested"/></sub></object>'
+           b'</result>')
+    monkeypatch.setattr(applus_scripttool.APplusScriptTool, "getXMLDefinitionString",
+                        lambda self, obj, mandant="": doc.decode("utf-8"))
+    d = tool.getXMLDefinitionObj("artikel")
+    assert not (d is None)
+    assert (d.root.get("name") == "top")
+
+    docNoMD5 = b'<result><object name="top"/></result>'
+    monkeypatch.setattr(applus_scripttool.APplusScriptTool, "getXMLDefinitionString",
+                        lambda self, obj, mandant="": docNoMD5.decode("utf-8"))
+    assert (tool.getXMLDefinitionObj("artikel") is None)
+
+
+def test_getXMLParserPerThread() -> None:
+    # lxml-Parser sind nicht threadsicher: jeder Thread bekommt seinen
+    # eigenen, innerhalb eines Threads wird er wiederverwendet
+    p1 = applus_scripttool._getXMLParser()
+    assert (applus_scripttool._getXMLParser() is p1)
+
+    other = []
+    t = threading.Thread(target=lambda: other.append(applus_scripttool._getXMLParser()))
+    t.start()
+    t.join()
+    assert not (other[0] is p1)
@@ -418,3 +418,34 @@ def test_SqlStatementSelect6() -> None:
 
     sql.where.addCondition("cond2")
     assert (str(sql) == "SELECT * FROM t WHERE ((cond1) OR (cond2))")
+
+
+def test_SqlStatementSelectCache() -> None:
+    sql = sql_utils.SqlStatementSelect("t")
+    sql.where.addCondition("cond1")
+    assert (str(sql) == "SELECT * FROM t WHERE (cond1)")
+    # wiederholtes Stringifizieren liefert den gecachten String
+    assert (str(sql) is str(sql))
+
+    # Änderungen invalidieren den Cache
+    sql.where.addCondition("cond2")
+    assert (str(sql) == "SELECT * FROM t WHERE ((cond1) AND (cond2))")
+    sql.order = "f1"
+    assert (str(sql) == "SELECT * FROM t WHERE ((cond1) AND (cond2)) ORDER BY f1")
+
+
+def test_SqlStatementSelectCacheWhereReassigned() -> None:
+    # eine komplett neu zugewiesene where-Bedingung invalidiert den Cache,
+    # auch wenn die Versionszähler beider Bedingungen übereinstimmen
+    sql = sql_utils.SqlStatementSelect("t")
+    sql.where.addCondition("cond1")
+    assert (str(sql) == "SELECT * FROM t WHERE (cond1)")
+
+    cond = sql_utils.SqlConditionAnd()
+    cond.addCondition("cond2")
+    sql.where = cond
+    assert (str(sql) == "SELECT * FROM t WHERE (cond2)")
+
+    # dasselbe für ersetzte Felder
+    sql.fields = ["f1"]
+    assert (str(sql) == "SELECT f1 FROM t WHERE (cond2)")